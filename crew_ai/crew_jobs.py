@@ -0,0 +1,140 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from linebot.v3.messaging import TextMessage
+
+from news_message import push_messages
+
+
+logger = logging.getLogger(__name__)
+
+
+CREW_JOB_WORKERS = int(os.environ.get("CREW_JOB_WORKERS", "2"))
+CREW_JOB_TTL_SECONDS = int(os.environ.get("CREW_JOB_TTL_SECONDS", "3600"))
+CREW_JOB_FAILED_MESSAGE = "ขออภัยค่ะ ไม่สามารถวิเคราะห์ข่าวการเงินได้ในขณะนี้ กรุณาลองใหม่อีกครั้งค่ะ"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+class JobStore:
+    """Interface for the store that tracks crew jobs.
+
+    A shared store (Firestore, Redis ...) lets status requests be answered
+    by any function instance, not only the one running the job.
+    """
+
+    def create(self, job):
+        raise NotImplementedError
+
+    def update(self, job_id, **fields):
+        raise NotImplementedError
+
+    def get(self, job_id):
+        """Returns a copy of the job dict, or None."""
+        raise NotImplementedError
+
+    def active_job_for(self, line_user_id):
+        """Returns the user's queued or running job, or None."""
+        raise NotImplementedError
+
+
+class InMemoryJobStore(JobStore):
+    def __init__(self, ttl_seconds=CREW_JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] and now - job["finished_at"] > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def create(self, job):
+        with self._lock:
+            self._prune(time.time())
+            self._jobs[job["job_id"]] = dict(job)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def active_job_for(self, line_user_id):
+        with self._lock:
+            for job in self._jobs.values():
+                if job["line_user_id"] == line_user_id and job["status"] in ACTIVE_STATUSES:
+                    return dict(job)
+        return None
+
+
+class CrewJobManager:
+    """Fetches the news digest in background workers and pushes it to the user.
+
+    submit() returns at once with a job ID. A second submission from a user
+    whose job is still queued or running attaches to that job. The crew
+    itself only runs when the NewsDigest has nothing for the current window.
+    """
+
+    def __init__(self, news_digest, store=None, workers=CREW_JOB_WORKERS):
+        self._news_digest = news_digest
+        self._store = store or InMemoryJobStore()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crew-job")
+        self._submit_lock = threading.Lock()
+
+    def submit(self, line_user_id):
+        """Returns (job dict, attached)."""
+        with self._submit_lock:
+            job = self._store.active_job_for(line_user_id)
+            if job is not None:
+                logger.info(f"Attaching {line_user_id} to running job {job['job_id']}")
+                return job, True
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "line_user_id": line_user_id,
+                "status": QUEUED,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            self._store.create(job)
+        self._executor.submit(self._run, job["job_id"], line_user_id)
+        return job, False
+
+    def status(self, job_id):
+        return self._store.get(job_id)
+
+    def refresh_digest(self):
+        """Runs the crew for a new digest in the background, e.g. from Cloud Scheduler."""
+        self._executor.submit(self._news_digest.get, True)
+
+    def _run(self, job_id, line_user_id):
+        self._store.update(job_id, status=RUNNING, started_at=time.time())
+        try:
+            push_messages(line_user_id, self._news_digest.get().messages)
+        except Exception as e:
+            logger.exception(f"Crew job {job_id} failed")
+            self._store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+            try:
+                push_messages(line_user_id, [TextMessage(text=CREW_JOB_FAILED_MESSAGE)])
+            except Exception as push_error:
+                logger.error(f"Could not notify {line_user_id}: {push_error}")
+            return
+        self._store.update(job_id, status=DONE, finished_at=time.time())
+        logger.info(f"Crew job {job_id} done")
@@ -1,73 +1,236 @@
 import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from crewai import Agent, Task, Crew
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.tools import DuckDuckGoSearchRun
+from search_cache import CachedDuckDuckGoSearchRun, search_cache, stats_delta
+
+logger = logging.getLogger(__name__)
 
 # Import Secrets
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Fan-out mode researches each topic with its own agent in parallel and
+# hands the merged research to the writer
+CREW_FANOUT = os.environ.get("CREW_FANOUT", "false").lower() == "true"
+CREW_FANOUT_CONCURRENCY = int(os.environ.get("CREW_FANOUT_CONCURRENCY", "4"))
+RESEARCH_TOPICS = {
+    "thai_equities": "Thai equities: the SET index, major Thai listed companies and sector moves",
+    "global_markets": "global markets: US, European and Asian stock indices and major company news",
+    "fx_rates": "FX and interest rates: the Thai baht, US dollar, central bank decisions and bond yields",
+    "funds": "mutual funds: Thai mutual fund flows, notable fund performance and new fund launches",
+}
+
+
+class FinancialNewsCrewFactory:
+    """Builds the Gemini clients, search tool and agents once per process.
+
+    Tasks and the Crew hold per-run state (task outputs, delegation tools
+    appended at kickoff, the crew's tool cache) so they are created fresh
+    for every run. Agents mutate their executor while working, so runs on
+    one factory are serialized.
+    """
+
+    def __init__(self):
+        self.startup_timings = {}
+        start = time.perf_counter()
+
+        # Tools, repeated queries across and within runs are answered from search_cache
+        self.search_tool = CachedDuckDuckGoSearchRun()
+        start = self._mark(self.startup_timings, "search_tool", start)
+
+        # One client per agent: each agent attaches its own token counter to its llm
+        researcher_llm = ChatGoogleGenerativeAI(model=GEMINI_MODEL)
+        writer_llm = ChatGoogleGenerativeAI(model=GEMINI_MODEL)
+        start = self._mark(self.startup_timings, "llm_clients", start)
+
+        # Define your agents with roles and goals
+        self.researcher = Agent(
+            role='Financial News Researcher',
+            goal='Research and summarize the latest financial news',
+            backstory="""You are an experienced financial analyst with a keen eye for market trends.
+            Your expertise lies in distilling complex financial information into concise summaries.""",
+            verbose=True,
+            allow_delegation=False,
+            tools=[self.search_tool],
+            llm=researcher_llm
+        )
+
+        self.writer = Agent(
+            role='Financial Content Writer',
+            goal='Craft engaging summaries of financial news',
+            backstory="""You are a seasoned financial writer known for making intricate financial topics accessible to a broad audience.""",
+            verbose=True,
+            llm=writer_llm,
+            allow_delegation=True
+        )
+        start = self._mark(self.startup_timings, "agents", start)
+
+        # Each topic gets its own agent and client so topics can run concurrently
+        self.topic_researchers = {}
+        if CREW_FANOUT:
+            for topic, focus in RESEARCH_TOPICS.items():
+                self.topic_researchers[topic] = Agent(
+                    role=f'Financial News Researcher ({topic})',
+                    goal=f'Research and summarize the latest news on {focus}',
+                    backstory="""You are an experienced financial analyst with a keen eye for market trends.
+                    Your expertise lies in distilling complex financial information into concise summaries.""",
+                    verbose=True,
+                    allow_delegation=False,
+                    tools=[self.search_tool],
+                    llm=ChatGoogleGenerativeAI(model=GEMINI_MODEL)
+                )
+            self._mark(self.startup_timings, "topic_agents", start)
+        logger.info(f"Crew factory startup timings: {self._format(self.startup_timings)}")
+
+        self.last_run_timings = {}
+        self.last_run_search_stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _mark(timings, name, start):
+        now = time.perf_counter()
+        timings[name] = now - start
+        return now
+
+    @staticmethod
+    def _format(timings):
+        return ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in timings.items())
+
+    def build_tasks(self):
+        # Create tasks for your agents
+        task1 = Task(
+            description="""Research and summarize the latest financial news for 2025.
+            Identify key trends, significant events, and potential market impacts.""",
+            expected_output="Bullet-point summary of the latest financial news",
+            agent=self.researcher
+        )
+
+        return [task1, self.build_writer_task()]
+
+    def build_writer_task(self, research=None):
+        description = """Using the research provided, develop an engaging summary
+            that highlights the most significant financial news.
+            The summary should be informative yet accessible, catering to a financially savvy audience.
+            Ensure clarity and conciseness."""
+        if research:
+            description += "\n\nResearch:\n" + research
+        return Task(
+            description=description,
+            expected_output="""Python Dictionanry of Summary Title and Comprehensive financial news summary of at least 4 paragraphs.
+            The summary should be informative yet accessible, catering to a financially savvy audience.
+            Ensure clarity and conciseness.
+
+            Result Example:
+            {
+                "title": "Financial News Summary - 2025",
+                "summary": "The financial markets in 2025 have been marked by significant volatility..."
+            }
+            """,
+            agent=self.writer
+        )
+
+    def research_topic(self, topic):
+        """Runs one topic researcher in its own crew, returns (topic, output, seconds)."""
+        start = time.perf_counter()
+        task = Task(
+            description=f"""Research and summarize the latest news for 2025 on {RESEARCH_TOPICS[topic]}.
+            Identify key trends, significant events, and potential market impacts.""",
+            expected_output="Bullet-point summary of the latest news on this topic",
+            agent=self.topic_researchers[topic]
+        )
+        output = Crew(agents=[task.agent], tasks=[task], verbose=2).kickoff()
+        return topic, output, time.perf_counter() - start
+
+    def kickoff(self):
+        if self.topic_researchers:
+            return self.kickoff_fanout()
+        timings = {}
+        with self._lock:
+            search_before = search_cache.stats()
+            start = time.perf_counter()
+            tasks = self.build_tasks()
+            start = self._mark(timings, "tasks", start)
+
+            # Instantiate your crew with a sequential process
+            crew = Crew(
+                agents=[self.researcher, self.writer],
+                tasks=tasks,
+                verbose=2,  # You can set it to 1 or 2 for different logging levels
+            )
+            start = self._mark(timings, "crew", start)
+
+            # Get your crew to work!
+            result = crew.kickoff()
+            self._mark(timings, "kickoff", start)
+            self.last_run_search_stats = stats_delta(search_before, search_cache.stats())
+
+        self.last_run_timings = timings
+        logger.info(f"Crew run timings: {self._format(timings)}")
+        logger.info(f"Crew run search cache: {self.last_run_search_stats}")
+        return result
+
+    def kickoff_fanout(self, concurrency=CREW_FANOUT_CONCURRENCY):
+        """Researches all topics in parallel, then merges them for the writer.
+
+        A failed topic is left out of the research; the run only fails when
+        every topic does.
+        """
+        timings = {}
+        research = []
+        with self._lock:
+            search_before = search_cache.stats()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="crew-topic") as executor:
+                futures = {executor.submit(self.research_topic, topic): topic for topic in self.topic_researchers}
+                for future, topic in futures.items():
+                    try:
+                        _, output, seconds = future.result()
+                    except Exception as e:
+                        logger.error(f"Research on {topic} failed: {e}")
+                        continue
+                    timings[f"topic_{topic}"] = seconds
+                    research.append(f"## {topic}\n{output}")
+            if not research:
+                raise RuntimeError("All research topics failed")
+            start = self._mark(timings, "research", start)
+
+            writer_task = self.build_writer_task(research="\n\n".join(research))
+            crew = Crew(agents=[self.writer], tasks=[writer_task], verbose=2)
+            start = self._mark(timings, "crew", start)
+
+            result = crew.kickoff()
+            self._mark(timings, "kickoff", start)
+            self.last_run_search_stats = stats_delta(search_before, search_cache.stats())
+
+        topic_total = sum(seconds for name, seconds in timings.items() if name.startswith("topic_"))
+        self.last_run_timings = timings
+        logger.info(
+            f"Crew fan-out timings: {self._format(timings)} "
+            f"(research wall {timings['research']:.1f}s vs {topic_total:.1f}s summed over topics)"
+        )
+        logger.info(f"Crew run search cache: {self.last_run_search_stats}")
+        return result
+
+
+_crew_factory = None
+_crew_factory_lock = threading.Lock()
+
+
+def get_crew_factory():
+    global _crew_factory
+    if _crew_factory is None:
+        with _crew_factory_lock:
+            if _crew_factory is None:
+                _crew_factory = FinancialNewsCrewFactory()
+    return _crew_factory
+
 
 def create_ai_financial_news_workflow():
-    
-    # Tools
-    search_tool = DuckDuckGoSearchRun()
-
-    # Define your agents with roles and goals
-    researcher = Agent(
-        role='Financial News Researcher',
-        goal='Research and summarize the latest financial news',
-        backstory="""You are an experienced financial analyst with a keen eye for market trends.
-        Your expertise lies in distilling complex financial information into concise summaries.""",
-        verbose=True,
-        allow_delegation=False,
-        tools=[search_tool],
-        llm=ChatGoogleGenerativeAI(model="gemini-2.0-flash")
-    )
-
-    writer = Agent(
-        role='Financial Content Writer',
-        goal='Craft engaging summaries of financial news',
-        backstory="""You are a seasoned financial writer known for making intricate financial topics accessible to a broad audience.""",
-        verbose=True,
-        llm=ChatGoogleGenerativeAI(model="gemini-2.0-flash"),
-        allow_delegation=True
-    )
-
-    # Create tasks for your agents
-    task1 = Task(
-        description="""Research and summarize the latest financial news for 2025.
-        Identify key trends, significant events, and potential market impacts.""",
-        expected_output="Bullet-point summary of the latest financial news",
-        llm=ChatGoogleGenerativeAI(model="gemini-2.0-flash"),
-        agent=researcher
-    )
-
-    task2 = Task(
-        description="""Using the research provided, develop an engaging summary
-        that highlights the most significant financial news.
-        The summary should be informative yet accessible, catering to a financially savvy audience.
-        Ensure clarity and conciseness.""",
-        expected_output="""Python Dictionanry of Summary Title and Comprehensive financial news summary of at least 4 paragraphs.
-        The summary should be informative yet accessible, catering to a financially savvy audience.
-        Ensure clarity and conciseness.
-        
-        Result Example:
-        {
-            "title": "Financial News Summary - 2025",
-            "summary": "The financial markets in 2025 have been marked by significant volatility..."
-        }
-        """,
-        agent=writer
-    )
-
-    # Instantiate your crew with a sequential process
-    crew = Crew(
-        agents=[researcher, writer],
-        tasks=[task1, task2],
-        verbose=2,  # You can set it to 1 or 2 for different logging levels
-    )
-
-    # Get your crew to work!
-    result = crew.kickoff()
+    result = get_crew_factory().kickoff()
 
     print("######################")
     return result
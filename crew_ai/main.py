@@ -2,23 +2,18 @@ import functions_framework
 import logging
 from flask import jsonify
 from financial_crew_ai_workflow import create_ai_financial_news_workflow
-import os
-import json
+from crew_jobs import CrewJobManager
+from news_digest import NewsDigest
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from linebot.v3.messaging import (
-    Configuration,
-    ApiClient,
-    MessagingApi,
-    PushMessageRequest,
-    TextMessage,
-    FlexContainer,
-    FlexCarousel,
-    FlexMessage,
-)
+# The news is the same for everyone, the crew runs once per digest interval
+news_digest = NewsDigest(create_ai_financial_news_workflow)
+# Crew runs take minutes; they run on background workers and the result is
+# pushed to the user, so callers get a job ID back straight away
+crew_jobs = CrewJobManager(news_digest)
 
 
 @functions_framework.http
@@ -30,88 +25,31 @@ def callback(request):
     logger.info(f"Arguments: {dict(request.args)}")
 
     try:
-        
-        text = create_ai_financial_news_workflow()
-        json_data = json.loads(text)
-        print(json_data)
-        news_title = json_data[0]["title"]
-        news_summary = json_data[0]["summary"]
-        bubble_string = {
-                    "type": "bubble",
-                    "hero": {
-                        "type": "image",
-                        "url": "https://storage.googleapis.com/punsiriboo_public/finance_news_title.png",
-                        "size": "full",
-                        "aspectRatio": "25:10",
-                        "aspectMode": "cover"
-                    },
-                    "body": {
-                        "type": "box",
-                        "layout": "vertical",
-                        "contents": [
-                        {
-                            "type": "text",
-                            "text": news_title,
-                            "weight": "bold",
-                            "size": "xl",
-                            "wrap": True
-                        },
-                        {
-                            "type": "separator",
-                            "margin": "md"
-                        },
-                        {
-                            "type": "box",
-                            "layout": "vertical",
-                            "margin": "md",
-                            "spacing": "sm",
-                            "contents": [
-                            {
-                                "type": "text",
-                                "text": news_summary,
-                                "wrap": True
-                            }
-                            ]
-                        }
-                        ]
-                    }
-                }
-
-        CHANNEL_ACCESS_TOKEN = os.environ.get("CHANNEL_ACCESS_TOKEN")
-        configuration = Configuration(
-            access_token=CHANNEL_ACCESS_TOKEN,
-        )
-
-        with ApiClient(configuration) as api_client:
-            line_bot_api = MessagingApi(api_client)
-            request_json = request.get_json(silent=True)
-            if request_json and isinstance(request_json, dict):
-                logger.info("Request body is JSON")
-                line_user_id = str(request_json.get("line_user_id", ""))
-                line_bot_api.push_message(
-                    PushMessageRequest(
-                        to=line_user_id, 
-                        messages=[TextMessage(text=text)]
-                    )
-                )
-                my_flex_message = FlexMessage(
-                    alt_text="hello",
-                    contents=FlexCarousel(
-                        type="carousel",
-                        contents=[
-                            FlexContainer.from_dict(bubble_string),
-                        ],
-                    ),
-                )
-                line_bot_api.reply_message(
-                    PushMessageRequest(
-                        to=line_user_id, messages=[my_flex_message]
-                    )
-                )
-                
+        # GET ?job_id=... returns the job status
+        job_id = request.args.get("job_id")
+        if job_id:
+            job = crew_jobs.status(job_id)
+            if job is None:
+                return jsonify({"error": "job not found"}), 404
+            return jsonify(job)
+
+        # POST ?refresh=1 (Cloud Scheduler) runs the crew ahead of user requests
+        if request.args.get("refresh"):
+            crew_jobs.refresh_digest()
+            return jsonify({"refresh": "started", "digest": news_digest.stats()}), 202
+
+        request_json = request.get_json(silent=True)
+        if not request_json or not isinstance(request_json, dict):
+            return jsonify({"error": "line_user_id is required"}), 400
+        logger.info("Request body is JSON")
+        line_user_id = str(request_json.get("line_user_id", ""))
+        if not line_user_id:
+            return jsonify({"error": "line_user_id is required"}), 400
+
+        job, attached = crew_jobs.submit(line_user_id)
     except Exception as e:
         error_message = str(e)
         logger.error(error_message)
         return f"Error: {error_message}", 500
 
-    return "OK"
+    return jsonify({"job_id": job["job_id"], "status": job["status"], "attached": attached}), 202
@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import Future
+
+from news_message import build_news_messages
+
+
+logger = logging.getLogger(__name__)
+
+
+NEWS_DIGEST_INTERVAL_SECONDS = int(os.environ.get("NEWS_DIGEST_INTERVAL_SECONDS", str(3600)))
+# After a failed run the stale digest is served this long before retrying
+NEWS_DIGEST_RETRY_SECONDS = int(os.environ.get("NEWS_DIGEST_RETRY_SECONDS", "300"))
+
+
+class Digest:
+    def __init__(self, text, window, created_at):
+        json_data = json.loads(text)
+        self.text = text
+        self.title = json_data[0]["title"]
+        self.summary = json_data[0]["summary"]
+        # Rendered once, the same message models are pushed to every user
+        self.messages = build_news_messages(text)
+        self.window = window
+        self.created_at = created_at
+
+
+class NewsDigest:
+    """Runs the news crew at most once per interval and shares the result.
+
+    Intervals are aligned to the clock (window = now // interval), so all
+    instances agree on when a digest goes stale. Concurrent misses in a
+    window wait on the single crew run already in flight. If a run fails
+    the previous digest, when there is one, keeps being served.
+    """
+
+    def __init__(
+        self,
+        workflow,
+        interval_seconds=NEWS_DIGEST_INTERVAL_SECONDS,
+        retry_seconds=NEWS_DIGEST_RETRY_SECONDS,
+        clock=time.time,
+    ):
+        self._workflow = workflow
+        self.interval_seconds = interval_seconds
+        self.retry_seconds = retry_seconds
+        self._retry_at = 0
+        self._clock = clock
+        self._digest = None
+        self._in_flight = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.hits = 0
+        self.merged = 0
+
+    def _window(self):
+        return int(self._clock() // self.interval_seconds)
+
+    def get(self, refresh=False):
+        """Returns the Digest of the current window, running the crew if needed."""
+        window = self._window()
+        with self._lock:
+            digest = self._digest
+            fresh = digest is not None and (digest.window == window or self._clock() < self._retry_at)
+            if not refresh and fresh:
+                self.hits += 1
+                return digest
+            if self._in_flight is not None:
+                self.merged += 1
+                future, leader = self._in_flight, False
+            else:
+                future, leader = Future(), True
+                self._in_flight = future
+                self.runs += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            logger.info(f"Running news crew for digest window {window}")
+            digest = Digest(str(self._workflow()), window, self._clock())
+        except Exception as e:
+            stale = self._digest
+            if stale is None:
+                future.set_exception(e)
+                raise
+            logger.error(f"News crew failed, serving digest from window {stale.window}: {e}")
+            self._retry_at = self._clock() + self.retry_seconds
+            digest = stale
+        else:
+            self._digest = digest
+        finally:
+            with self._lock:
+                self._in_flight = None
+        future.set_result(digest)
+        return digest
+
+    def stats(self):
+        with self._lock:
+            return {"runs": self.runs, "hits": self.hits, "merged": self.merged}
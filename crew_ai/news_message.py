@@ -0,0 +1,81 @@
+import os
+import json
+
+from linebot.v3.messaging import (
+    Configuration,
+    ApiClient,
+    MessagingApi,
+    PushMessageRequest,
+    TextMessage,
+    FlexContainer,
+    FlexCarousel,
+    FlexMessage,
+)
+
+
+NEWS_HERO_IMAGE_URL = "https://storage.googleapis.com/punsiriboo_public/finance_news_title.png"
+
+
+def build_news_bubble(news_title, news_summary):
+    return {
+        "type": "bubble",
+        "hero": {
+            "type": "image",
+            "url": NEWS_HERO_IMAGE_URL,
+            "size": "full",
+            "aspectRatio": "25:10",
+            "aspectMode": "cover"
+        },
+        "body": {
+            "type": "box",
+            "layout": "vertical",
+            "contents": [
+                {
+                    "type": "text",
+                    "text": news_title,
+                    "weight": "bold",
+                    "size": "xl",
+                    "wrap": True
+                },
+                {
+                    "type": "separator",
+                    "margin": "md"
+                },
+                {
+                    "type": "box",
+                    "layout": "vertical",
+                    "margin": "md",
+                    "spacing": "sm",
+                    "contents": [
+                        {
+                            "type": "text",
+                            "text": news_summary,
+                            "wrap": True
+                        }
+                    ]
+                }
+            ]
+        }
+    }
+
+
+def build_news_messages(text):
+    """Turns the crew output (a JSON list of {"title", "summary"}) into LINE messages."""
+    json_data = json.loads(text)
+    news_title = json_data[0]["title"]
+    news_summary = json_data[0]["summary"]
+    flex_message = FlexMessage(
+        alt_text=news_title,
+        contents=FlexCarousel(
+            type="carousel",
+            contents=[FlexContainer.from_dict(build_news_bubble(news_title, news_summary))],
+        ),
+    )
+    return [TextMessage(text=text), flex_message]
+
+
+def push_messages(line_user_id, messages):
+    configuration = Configuration(access_token=os.environ.get("CHANNEL_ACCESS_TOKEN"))
+    with ApiClient(configuration) as api_client:
+        line_bot_api = MessagingApi(api_client)
+        line_bot_api.push_message(PushMessageRequest(to=line_user_id, messages=messages))
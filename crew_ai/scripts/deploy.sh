@@ -17,3 +17,9 @@ gcloud functions deploy $FUNCTION_NAME \
     --timeout=600s \
     --memory=1GB \
     --env-vars-file=secret.yml \
+
+
+# Crew jobs keep running after the 202 response, keep CPU allocated between requests
+gcloud run services update $FUNCTION_NAME \
+    --region=asia-southeast1 \
+    --no-cpu-throttling
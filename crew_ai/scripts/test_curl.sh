@@ -1,3 +1,7 @@
 curl -X POST "https://asia-southeast1-dataaibootcamp.cloudfunctions.net/call_crew_ai_execution" \
      -H "Content-Type: application/json" \
      -d '{"line_user_id": "Uadeb2bc31f4141fea4c4427fe53db976"}'
+
+
+# Refresh the shared news digest (what a Cloud Scheduler job would call)
+curl -X POST "https://asia-southeast1-dataaibootcamp.cloudfunctions.net/call_crew_ai_execution?refresh=1"
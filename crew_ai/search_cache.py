@@ -0,0 +1,192 @@
+import os
+import re
+import time
+import logging
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Optional
+
+from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_community.tools import DuckDuckGoSearchRun
+
+
+logger = logging.getLogger(__name__)
+
+
+SEARCH_CACHE_MAX_SIZE = int(os.environ.get("SEARCH_CACHE_MAX_SIZE", "1024"))
+SEARCH_CACHE_TTL_SECONDS = int(os.environ.get("SEARCH_CACHE_TTL_SECONDS", str(6 * 3600)))
+# Optional sqlite file so cached results survive restarts, e.g. /tmp/search_cache.db
+SEARCH_CACHE_DB_PATH = os.environ.get("SEARCH_CACHE_DB_PATH")
+# ASCII punctuation only: Thai vowels and tone marks are not \w and must stay
+PUNCTUATION = re.compile(r"[!-/:-@\[-`{-~]")
+
+
+def normalize_search_query(query):
+    """Case, ASCII punctuation and spacing do not change a cache key.
+
+    Word order does ("USD to THB" vs "THB to USD"), and Thai marks are kept
+    so "ข่าว" and "ขาว" stay different queries.
+    """
+    text = unicodedata.normalize("NFC", query).casefold()
+    return " ".join(PUNCTUATION.sub(" ", text).split())
+
+
+class SqliteSearchBackend:
+    def __init__(self, path, max_size=SEARCH_CACHE_MAX_SIZE * 4):
+        self.max_size = max_size
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache "
+                "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM search_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl_seconds):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?)", (key, value, now + ttl_seconds)
+            )
+            self._conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM search_cache WHERE key IN (SELECT key FROM search_cache "
+                "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+
+
+class SearchCache:
+    """TTL/LRU cache of search results keyed on the normalized query.
+
+    Identical queries already in flight wait for that search instead of
+    sending their own (singleflight). Errors are not cached. With a backend,
+    memory misses are looked up there and results written through.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        max_size=SEARCH_CACHE_MAX_SIZE,
+        ttl_seconds=SEARCH_CACHE_TTL_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.backend = backend
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._data = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[0] <= self._clock():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return item[1]
+
+    def _store(self, key, value):
+        self._data[key] = (self._clock() + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def get_or_search(self, query, search):
+        key = normalize_search_query(query)
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = self.backend.get(key) if self.backend is not None else None
+            from_disk = value is not None
+            if value is None:
+                value = search(query)
+                if self.backend is not None:
+                    try:
+                        self.backend.set(key, value, self.ttl_seconds)
+                    except Exception as e:
+                        logger.warning(f"Could not persist search result: {e}")
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+                self.misses += 1
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._store(key, value)
+            del self._in_flight[key]
+            if from_disk:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        future.set_result(value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+            }
+
+
+def stats_delta(before, after):
+    """Counters between two stats() snapshots, with the hit rate of that span."""
+    delta = {name: after[name] - before[name] for name in ("hits", "disk_hits", "coalesced", "misses")}
+    lookups = sum(delta.values())
+    delta["hit_rate"] = (lookups - delta["misses"]) / lookups if lookups else 0.0
+    return delta
+
+
+search_cache = SearchCache(
+    backend=SqliteSearchBackend(SEARCH_CACHE_DB_PATH) if SEARCH_CACHE_DB_PATH else None
+)
+
+
+class CachedDuckDuckGoSearchRun(DuckDuckGoSearchRun):
+    """DuckDuckGoSearchRun answering repeated queries from search_cache."""
+
+    cache: Any = None
+
+    def _run(
+        self,
+        query: str,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> str:
+        return (self.cache or search_cache).get_or_search(query, self.api_wrapper.run)
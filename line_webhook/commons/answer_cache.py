@@ -0,0 +1,159 @@
+import os
+import re
+import zlib
+import threading
+
+import numpy as np
+
+from commons.ttl_cache import TTLCache
+from commons.thai_text import normalize_thai, char_ngrams
+
+
+# Off by default: entries are shared by every user and ignore the CX session,
+# so only enable it for agents whose answers never depend on earlier turns
+# (a hit also skips detect_intent, and the session does not move forward)
+ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+ANSWER_CACHE_MAX_SIZE = int(os.environ.get("ANSWER_CACHE_MAX_SIZE", "2048"))
+ANSWER_CACHE_TTL_SECONDS = int(os.environ.get("ANSWER_CACHE_TTL_SECONDS", str(3600)))
+# Jaccard similarity of character shingles needed to reuse an answer
+ANSWER_CACHE_SIMILARITY = float(os.environ.get("ANSWER_CACHE_SIMILARITY", "0.8"))
+# Short messages ("ครับ", "ok") are follow-ups whose answer depends on the session
+ANSWER_CACHE_MIN_CHARS = int(os.environ.get("ANSWER_CACHE_MIN_CHARS", "8"))
+SHINGLE_SIZE = 3
+NUMBER = re.compile(r"\d+(?:[,.]\d+)*")
+THOUSANDS_SEPARATOR = re.compile(r"(?<=\d),(?=\d)")
+LSH_BANDS = 16
+LSH_ROWS = 4
+
+MERSENNE_PRIME = (1 << 31) - 1
+_random = np.random.RandomState(20240601)
+_PERM_A = _random.randint(1, MERSENNE_PRIME, LSH_BANDS * LSH_ROWS).astype(np.uint64)[:, None]
+_PERM_B = _random.randint(0, MERSENNE_PRIME, LSH_BANDS * LSH_ROWS).astype(np.uint64)[:, None]
+
+
+def minhash_signature(shingles):
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64)
+    return ((_PERM_A * hashes + _PERM_B) % MERSENNE_PRIME).min(axis=1)
+
+
+def band_keys(signature):
+    rows = signature.reshape(LSH_BANDS, LSH_ROWS)
+    return [(band, row.tobytes()) for band, row in enumerate(rows)]
+
+
+def numbers_in(text):
+    """Amounts, ages and years in text, e.g. ("50000", "2566")."""
+    text = THOUSANDS_SEPARATOR.sub("", normalize_thai(text, keep_spaces=True))
+    return tuple(NUMBER.findall(text))
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+class AnswerCache:
+    """Reuses CX reply messages for questions worded almost the same way.
+
+    Questions are normalized (case, whitespace, tone marks, Thai digits) and
+    looked up exactly first. Otherwise MinHash/LSH over character shingles
+    gives candidates that share a band, and the best one whose exact Jaccard
+    similarity reaches the threshold is reused. Either way the numbers in
+    both questions must be the same: "เงินเดือน 50000" and "เงินเดือน
+    500000" are near-duplicates as text but need different answers.
+    Entries live in a TTLCache; band buckets drop keys of expired or
+    evicted entries as they are found.
+    """
+
+    def __init__(
+        self,
+        max_size=ANSWER_CACHE_MAX_SIZE,
+        ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+        similarity=ANSWER_CACHE_SIMILARITY,
+        min_chars=ANSWER_CACHE_MIN_CHARS,
+    ):
+        self.max_size = max_size
+        self.similarity = similarity
+        self.min_chars = min_chars
+        self._entries = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.near_hits = 0
+
+    def _key(self, text, language_code):
+        normalized = THOUSANDS_SEPARATOR.sub("", normalize_thai(text))
+        if len(normalized) < self.min_chars:
+            return None
+        return language_code, normalized
+
+    def _candidates(self, language_code, signature):
+        keys = set()
+        with self._lock:
+            for band_key in band_keys(signature):
+                bucket = self._buckets.get((language_code, band_key))
+                if bucket:
+                    keys.update(bucket)
+        return keys
+
+    def get(self, text, language_code="th"):
+        """Returns the cached reply messages for text, or None."""
+        key = self._key(text, language_code)
+        if key is None:
+            return None
+        numbers = numbers_in(text)
+        entry = self._entries.get(key)
+        # The key drops spaces, so "อายุ 30 60" and "อายุ 3060" share it
+        if entry is not None and entry[1] == numbers:
+            return entry[2]
+
+        shingles = char_ngrams(key[1], SHINGLE_SIZE)
+        best_score, best_messages = self.similarity, None
+        for candidate in self._candidates(language_code, minhash_signature(shingles)):
+            entry = self._entries.get(candidate)
+            if entry is None:
+                self._discard(candidate)
+                continue
+            if entry[1] != numbers:
+                continue
+            score = jaccard(shingles, entry[0])
+            if score >= best_score:
+                best_score, best_messages = score, entry[2]
+        if best_messages is not None:
+            with self._lock:
+                self.near_hits += 1
+        return best_messages
+
+    def set(self, text, messages, language_code="th"):
+        key = self._key(text, language_code)
+        if key is None:
+            return
+        shingles = char_ngrams(key[1], SHINGLE_SIZE)
+        self._entries.set(key, (shingles, numbers_in(text), messages))
+        with self._lock:
+            for band_key in band_keys(minhash_signature(shingles)):
+                self._buckets.setdefault((language_code, band_key), set()).add(key)
+            if len(self._buckets) > 2 * LSH_BANDS * self.max_size:
+                self._rebuild()
+
+    def _discard(self, key):
+        with self._lock:
+            for band_key in band_keys(minhash_signature(char_ngrams(key[1], SHINGLE_SIZE))):
+                bucket = self._buckets.get((key[0], band_key))
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._buckets[(key[0], band_key)]
+
+    def _rebuild(self):
+        self._buckets = {}
+        for key, (shingles, _, _) in self._entries.items():
+            for band_key in band_keys(minhash_signature(shingles)):
+                self._buckets.setdefault((key[0], band_key), set()).add(key)
+
+    def stats(self):
+        stats = self._entries.stats()
+        stats["near_hits"] = self.near_hits
+        stats["buckets"] = len(self._buckets)
+        return stats
+
+
+answer_cache = AnswerCache()
@@ -0,0 +1,157 @@
+import os
+import time
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from commons.client_registry import get_speech_client
+
+
+logger = logging.getLogger(__name__)
+
+
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_BYTES_PER_SAMPLE = 2
+AUDIO_SEGMENT_SECONDS = float(os.environ.get("AUDIO_SEGMENT_SECONDS", "15"))
+AUDIO_TRANSCRIBE_CONCURRENCY = int(os.environ.get("AUDIO_TRANSCRIBE_CONCURRENCY", "8"))
+AUDIO_PER_USER_LIMIT = int(os.environ.get("AUDIO_PER_USER_LIMIT", "2"))
+AUDIO_LANGUAGE_CODE = os.environ.get("AUDIO_LANGUAGE_CODE", "th-TH")
+# "google" for Cloud Speech-to-Text, "local" for the offline stand-in
+SPEECH_BACKEND = os.environ.get("SPEECH_BACKEND", "google")
+
+
+def decode_audio(audio_path, sample_rate=AUDIO_SAMPLE_RATE):
+    """Decodes an ffmpeg-readable audio file (LINE sends m4a) to 16-bit mono PCM.
+
+    ffmpeg reads the file itself, so the note is never held in memory as
+    bytes and it can seek to an m4a index stored at the end.
+    """
+    result = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-i", audio_path,
+            "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate),
+            "pipe:1",
+        ],
+        capture_output=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def split_pcm(pcm, segment_seconds=AUDIO_SEGMENT_SECONDS, sample_rate=AUDIO_SAMPLE_RATE):
+    segment_size = int(segment_seconds * sample_rate) * AUDIO_BYTES_PER_SAMPLE
+    return [pcm[i : i + segment_size] for i in range(0, len(pcm), segment_size)]
+
+
+class TranscriptionBusyError(Exception):
+    """The user already has per_user_limit voice notes being transcribed."""
+
+
+class SpeechBackend:
+    """Interface for a speech-to-text service that transcribes one PCM segment."""
+
+    def transcribe(self, pcm, sample_rate, language_code):
+        raise NotImplementedError
+
+
+class GoogleSpeechBackend(SpeechBackend):
+    def transcribe(self, pcm, sample_rate, language_code):
+        from google.cloud import speech_v1 as speech
+
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=sample_rate,
+            language_code=language_code,
+            enable_automatic_punctuation=True,
+        )
+        response = get_speech_client().recognize(
+            config=config, audio=speech.RecognitionAudio(content=pcm)
+        )
+        return " ".join(
+            result.alternatives[0].transcript
+            for result in response.results
+            if result.alternatives
+        )
+
+
+class LocalSpeechBackend(SpeechBackend):
+    """Offline stand-in that takes real_time_factor x the segment duration."""
+
+    def __init__(self, text="ทดสอบ", real_time_factor=0.0):
+        self.text = text
+        self.real_time_factor = real_time_factor
+
+    def transcribe(self, pcm, sample_rate, language_code):
+        duration = len(pcm) / (sample_rate * AUDIO_BYTES_PER_SAMPLE)
+        time.sleep(duration * self.real_time_factor)
+        return self.text
+
+
+class AudioTranscriber:
+    """Transcribes voice messages by fanning segments out to a speech backend.
+
+    A long note takes about as long as its slowest segment instead of its
+    full length. Each user may only have per_user_limit notes in flight.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        concurrency=AUDIO_TRANSCRIBE_CONCURRENCY,
+        segment_seconds=AUDIO_SEGMENT_SECONDS,
+        per_user_limit=AUDIO_PER_USER_LIMIT,
+        language_code=AUDIO_LANGUAGE_CODE,
+        sample_rate=AUDIO_SAMPLE_RATE,
+    ):
+        self.backend = backend or GoogleSpeechBackend()
+        self.segment_seconds = segment_seconds
+        self.per_user_limit = per_user_limit
+        self.language_code = language_code
+        self.sample_rate = sample_rate
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="audio-transcribe"
+        )
+        # Notes in flight per user, a user is dropped once they have none
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, user_id):
+        with self._lock:
+            in_flight = self._in_flight.get(user_id, 0)
+            if in_flight >= self.per_user_limit:
+                return False
+            self._in_flight[user_id] = in_flight + 1
+            return True
+
+    def _release(self, user_id):
+        with self._lock:
+            in_flight = self._in_flight[user_id] - 1
+            if in_flight:
+                self._in_flight[user_id] = in_flight
+            else:
+                del self._in_flight[user_id]
+
+    def transcribe_pcm(self, pcm):
+        segments = split_pcm(pcm, self.segment_seconds, self.sample_rate)
+        texts = self._executor.map(
+            lambda segment: self.backend.transcribe(segment, self.sample_rate, self.language_code),
+            segments,
+        )
+        return " ".join(text.strip() for text in texts if text and text.strip())
+
+    def transcribe(self, audio_path, user_id):
+        """Returns the transcript, raises TranscriptionBusyError if the user is over their limit."""
+        if not self._acquire(user_id):
+            logger.info(f"User {user_id} has too many voice messages in progress")
+            raise TranscriptionBusyError(user_id)
+        try:
+            return self.transcribe_pcm(decode_audio(audio_path, self.sample_rate))
+        finally:
+            self._release(user_id)
+
+
+audio_transcriber = AudioTranscriber(
+    backend=LocalSpeechBackend() if SPEECH_BACKEND == "local" else GoogleSpeechBackend()
+)
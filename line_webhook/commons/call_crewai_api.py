@@ -1,8 +1,19 @@
-def crewai_analyze_news(line_user_id:str):
-    import requests
-    import json
+import os
+import json
 
-    url = "https://asia-southeast1-dataaibootcamp.cloudfunctions.net/call_crew_ai_execution"
+import requests
+
+
+CREWAI_API_URL = os.environ.get(
+    "CREWAI_API_URL", "https://asia-southeast1-dataaibootcamp.cloudfunctions.net/call_crew_ai_execution"
+)
+# The crew function answers with a job ID right away and pushes the result
+# later, so the webhook only waits for the submission
+CREWAI_API_TIMEOUT = (3.05, float(os.environ.get("CREWAI_API_TIMEOUT_SECONDS", "10")))
+
+
+def crewai_analyze_news(line_user_id: str):
+    """Submits a news analysis job, returns {"job_id", "status", "attached"} or None."""
     headers = {
         "Content-Type": "application/json"
     }
@@ -11,8 +22,12 @@ def crewai_analyze_news(line_user_id:str):
     }
 
     try:
-        response = requests.post(url, headers=headers, data=json.dumps(data))
+        response = requests.post(
+            CREWAI_API_URL, headers=headers, data=json.dumps(data), timeout=CREWAI_API_TIMEOUT
+        )
         response.raise_for_status()  # ตรวจสอบว่าคำขอสำเร็จหรือไม่
         print("Response:", response.json())
+        return response.json()
     except requests.exceptions.RequestException as e:
-        print("Error:", e)
\ No newline at end of file
+        print("Error:", e)
+        return None
@@ -0,0 +1,99 @@
+import os
+import threading
+
+# gRPC channel options applied to every Google Cloud client built here
+GRPC_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", int(os.environ.get("GRPC_KEEPALIVE_TIME_MS", "30000"))),
+    ("grpc.keepalive_timeout_ms", int(os.environ.get("GRPC_KEEPALIVE_TIMEOUT_MS", "10000"))),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.max_receive_message_length", int(os.environ.get("GRPC_MAX_RECEIVE_MESSAGE_LENGTH", str(32 * 1024 * 1024)))),
+]
+
+_clients = {}
+_lock = threading.RLock()
+
+
+def get_client(key, factory):
+    """Returns the client stored under key, building it with factory on first use."""
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+
+def _grpc_client(client_cls, api_endpoint=None):
+    transport_cls = client_cls.get_transport_class("grpc")
+    host = api_endpoint or client_cls.DEFAULT_ENDPOINT
+    channel = transport_cls.create_channel(host, options=GRPC_CHANNEL_OPTIONS)
+    return client_cls(transport=transport_cls(host=host, channel=channel))
+
+
+def get_sessions_client(location_id):
+    from google.cloud import dialogflowcx_v3beta1 as dialogflow
+
+    api_endpoint = None
+    if location_id != "global":
+        api_endpoint = f"{location_id}-dialogflow.googleapis.com:443"
+    return get_client(
+        ("dialogflow_sessions", location_id),
+        lambda: _grpc_client(dialogflow.SessionsClient, api_endpoint),
+    )
+
+
+def get_sessions_async_client(location_id):
+    """Async CX client, must be first used from the event loop that will await it."""
+    from google.cloud import dialogflowcx_v3beta1 as dialogflow
+
+    api_endpoint = None
+    if location_id != "global":
+        api_endpoint = f"{location_id}-dialogflow.googleapis.com:443"
+
+    def factory():
+        client_cls = dialogflow.SessionsAsyncClient
+        transport_cls = client_cls.get_transport_class("grpc_asyncio")
+        host = api_endpoint or client_cls.DEFAULT_ENDPOINT
+        channel = transport_cls.create_channel(host, options=GRPC_CHANNEL_OPTIONS)
+        return client_cls(transport=transport_cls(host=host, channel=channel))
+
+    return get_client(("dialogflow_sessions_async", location_id), factory)
+
+
+def get_search_client(location):
+    from google.cloud import discoveryengine_v1 as discoveryengine
+
+    api_endpoint = None
+    if location != "global":
+        api_endpoint = f"{location}-discoveryengine.googleapis.com"
+    return get_client(
+        ("discoveryengine_search", location),
+        lambda: _grpc_client(discoveryengine.SearchServiceClient, api_endpoint),
+    )
+
+
+def get_storage_client():
+    from google.cloud import storage
+
+    return get_client("storage", storage.Client)
+
+
+def get_generative_model(model_name, project_id, location="us-central1"):
+    import vertexai
+    import vertexai.generative_models as genai
+
+    get_client(
+        ("vertexai_init", project_id, location),
+        lambda: vertexai.init(project=project_id, location=location) or True,
+    )
+    return get_client(
+        ("generative_model", model_name), lambda: genai.GenerativeModel(model_name)
+    )
+
+
+def get_speech_client():
+    from google.cloud import speech_v1 as speech
+
+    return get_client("speech", lambda: _grpc_client(speech.SpeechClient))
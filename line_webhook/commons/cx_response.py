@@ -0,0 +1,40 @@
+from google.protobuf.json_format import MessageToDict
+
+
+# Positions of the agent reply and the product search tool call in the
+# action trace of our generative playbook
+AGENT_UTTERANCE_ACTION = 2
+SEARCH_TOOL_ACTION = 1
+
+
+def extract_cx_response(response):
+    """Reads reply texts and the tool-use search_result from a DetectIntentResponse.
+
+    Works on the raw protobuf so only the search_result struct is converted
+    to Python objects, instead of the whole response via MessageToDict.
+    Returns (texts, search_result), texts in reply order without duplicates.
+    """
+    query_result = getattr(response, "_pb", response).query_result
+    actions = query_result.generative_info.action_tracing_info.actions
+
+    texts = []
+    if len(actions) > AGENT_UTTERANCE_ACTION:
+        text = actions[AGENT_UTTERANCE_ACTION].agent_utterance.text
+        if text:
+            texts.append(text)
+
+    response_messages = query_result.response_messages
+    if response_messages and response_messages[0].text.text:
+        text = response_messages[0].text.text[0]
+        if text and text not in texts:
+            texts.append(text)
+
+    search_result = None
+    if len(actions) > SEARCH_TOOL_ACTION:
+        fields = actions[SEARCH_TOOL_ACTION].tool_use.output_action_parameters.fields
+        if "200" in fields:
+            output = fields["200"].struct_value.fields
+            if "search_result" in output:
+                search_result = MessageToDict(output["search_result"])
+
+    return texts, search_result
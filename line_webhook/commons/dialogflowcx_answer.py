@@ -1,6 +1,16 @@
 import os
+import concurrent.futures
+from google.api_core.exceptions import DeadlineExceeded
 from google.cloud import dialogflowcx_v3beta1 as dialogflow
-from google.protobuf.json_format import MessageToDict
+
+from commons.client_registry import get_sessions_client
+from commons.cx_response import extract_cx_response
+from commons.answer_cache import answer_cache, ANSWER_CACHE_ENABLED
+from commons.dialogflowcx_async import reply_deadline, detect_intent_with_deadline
+
+# Use the async CX client with a deadline taken from the reply token budget
+CX_ASYNC_PATH = os.environ.get("CX_ASYNC_PATH", "false").lower() == "true"
+CX_TIMEOUT_MESSAGE = "ขออภัยค่ะ ระบบใช้เวลาตอบนานเกินไป กรุณาลองถามใหม่อีกครั้งค่ะ"
 
 from linebot.v3.messaging import (
     ReplyMessageRequest,
@@ -8,7 +18,18 @@ from linebot.v3.messaging import (
 )
 
 
-def detect_intent_text(text, session_id, line_bot_api, reply_token, language_code="th"):
+def detect_intent_text(
+    text, session_id, line_bot_api, reply_token, language_code="th", event_timestamp=None
+):
+
+    if ANSWER_CACHE_ENABLED:
+        cached_msgs = answer_cache.get(text, language_code)
+        if cached_msgs is not None:
+            print("Answer cache:", answer_cache.stats())
+            line_bot_api.reply_message(
+                ReplyMessageRequest(reply_token=reply_token, messages=cached_msgs)
+            )
+            return
 
     project_id = os.environ["CONVERSATIONAL_AGENT_PROJECT_ID"]
     location_id = os.environ["CONVERSATIONAL_AGENT_LOCATION"]
@@ -19,66 +40,33 @@ def detect_intent_text(text, session_id, line_bot_api, reply_token, language_cod
     agent = f"projects/{project_id}/locations/{location_id}/agents/{agent_id}"
     session_path = f"{agent}/sessions/{session_id}"
 
-    client_options = None
-    if location_id != "global":
-        api_endpoint = f"{location_id}-dialogflow.googleapis.com:443"
-        client_options = {"api_endpoint": api_endpoint}
-
-    session_client = dialogflow.SessionsClient(client_options=client_options)
     text_input = dialogflow.TextInput(text=text)
     query_input = dialogflow.QueryInput(text=text_input, language_code=language_code)
     request = dialogflow.DetectIntentRequest(
         session=session_path, query_input=query_input
     )
-    response = session_client.detect_intent(request=request)
-    response_dict = MessageToDict(response._pb)
-    print(response_dict)
-
-    def get_nested(data, keys, default=None):
-        for key in keys:
-            try:
-                data = data[key]
-            except (KeyError, IndexError, TypeError):
-                return default
-        return data
-
-    line_resp_msgs = []
-    text_response = []
-    keys = [
-        "queryResult",
-        "generativeInfo",
-        "actionTracingInfo",
-        "actions",
-        2,
-        "agentUtterance",
-        "text",
-    ]
-    response_text = get_nested(response_dict, keys, default=None)
-    if response_text:
-        text_response.append(response_text)
-
-    keys = ["queryResult", "responseMessages", 0, "text", "text", 0]
-    response_text = get_nested(response_dict, keys, default=None)
-    if response_text:
-        text_response.append(response_text)
-
-    keys = [
-        "queryResult",
-        "generativeInfo",
-        "actionTracingInfo",
-        "actions",
-        1,
-        "toolUse",
-        "outputActionParameters",
-        "200",
-        "search_result",
-    ]
-    search_result = get_nested(response_dict, keys, default=None)
-
-    # Make unique text reponse
-    text_response = list(set(text_response))
-    for text in text_response:
-        line_resp_msgs.append(TextMessage(text=text))
+    if CX_ASYNC_PATH and event_timestamp is not None:
+        deadline = reply_deadline(event_timestamp)
+        if deadline <= 0:
+            print("Reply token budget already spent, skipping CX call")
+            return
+        try:
+            response = detect_intent_with_deadline(request, location_id, deadline)
+        except (DeadlineExceeded, concurrent.futures.TimeoutError):
+            print(f"CX did not answer within {deadline:.1f}s")
+            line_bot_api.reply_message(
+                ReplyMessageRequest(
+                    reply_token=reply_token, messages=[TextMessage(text=CX_TIMEOUT_MESSAGE)]
+                )
+            )
+            return
+    else:
+        session_client = get_sessions_client(location_id)
+        response = session_client.detect_intent(request=request)
+    text_response, search_result = extract_cx_response(response)
+    print("CX response texts:", text_response)
+
+    line_resp_msgs = [TextMessage(text=text) for text in text_response]
 
     if search_result:
         from commons.flex_message_builder import build_products_search_result_carousel
@@ -86,6 +74,9 @@ def detect_intent_text(text, session_id, line_bot_api, reply_token, language_cod
         flex_carousel = build_products_search_result_carousel(search_result)
         line_resp_msgs.append(flex_carousel)
 
+    if ANSWER_CACHE_ENABLED and line_resp_msgs:
+        answer_cache.set(text, line_resp_msgs, language_code)
+
     line_bot_api.reply_message(
         ReplyMessageRequest(reply_token=reply_token, messages=line_resp_msgs)
     )
@@ -0,0 +1,119 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from collections import deque
+
+from commons.client_registry import get_sessions_async_client
+
+
+logger = logging.getLogger(__name__)
+
+
+LINE_REPLY_TOKEN_TTL_SECONDS = float(os.environ.get("LINE_REPLY_TOKEN_TTL_SECONDS", "60"))
+# Time kept back for building and sending the reply after CX answers
+CX_DEADLINE_MARGIN_SECONDS = float(os.environ.get("CX_DEADLINE_MARGIN_SECONDS", "5"))
+# Hedged requests run the same query twice on the CX session, only enable
+# them for agents where a repeated turn is harmless
+CX_HEDGE_ENABLED = os.environ.get("CX_HEDGE_ENABLED", "false").lower() == "true"
+CX_HEDGE_MIN_SAMPLES = int(os.environ.get("CX_HEDGE_MIN_SAMPLES", "20"))
+CX_HEDGE_PERCENTILE = float(os.environ.get("CX_HEDGE_PERCENTILE", "0.95"))
+
+
+def reply_deadline(event_timestamp_ms, now=None):
+    """Seconds left to call CX before the event's reply token expires."""
+    now = time.time() if now is None else now
+    elapsed = now - event_timestamp_ms / 1000
+    return LINE_REPLY_TOKEN_TTL_SECONDS - CX_DEADLINE_MARGIN_SECONDS - elapsed
+
+
+class LatencyTracker:
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction, min_samples=CX_HEDGE_MIN_SAMPLES):
+        """Returns the latency percentile, None until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+cx_latency = LatencyTracker()
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop():
+    """One background event loop per process shared by all CX calls.
+
+    gRPC asyncio channels are bound to the loop that created them, so the
+    async client lives on this loop and sync callers submit coroutines to it.
+    """
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="cx-event-loop", daemon=True
+                ).start()
+                _loop = loop
+    return _loop
+
+
+async def _first_successful(tasks):
+    pending = set(tasks)
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return task.result()
+            error = task.exception()
+    raise error
+
+
+async def detect_intent_async(request, location_id, deadline, hedge=CX_HEDGE_ENABLED):
+    """Calls CX with a deadline, optionally hedging after the p95 latency."""
+    client = get_sessions_async_client(location_id)
+    start = time.monotonic()
+    primary = asyncio.ensure_future(client.detect_intent(request=request, timeout=deadline))
+    tasks = [primary]
+
+    hedge_delay = cx_latency.percentile(CX_HEDGE_PERCENTILE) if hedge else None
+    if hedge_delay is not None and hedge_delay < deadline:
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if not done:
+            remaining = deadline - (time.monotonic() - start)
+            logger.info(f"CX slower than p95 ({hedge_delay:.2f}s), sending hedged request")
+            tasks.append(
+                asyncio.ensure_future(client.detect_intent(request=request, timeout=remaining))
+            )
+
+    response = await _first_successful(tasks)
+    cx_latency.record(time.monotonic() - start)
+    return response
+
+
+def detect_intent_with_deadline(request, location_id, deadline):
+    """Blocking wrapper around detect_intent_async for the webhook handlers."""
+    future = asyncio.run_coroutine_threadsafe(
+        detect_intent_async(request, location_id, deadline), _event_loop()
+    )
+    try:
+        return future.result(timeout=deadline + 1)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
@@ -0,0 +1,70 @@
+import os
+import logging
+
+from commons.ttl_cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+EVENT_DEDUP_MAX_SIZE = int(os.environ.get("EVENT_DEDUP_MAX_SIZE", "10000"))
+EVENT_DEDUP_TTL_SECONDS = int(os.environ.get("EVENT_DEDUP_TTL_SECONDS", "3600"))
+
+
+class DedupStore:
+    """Interface for the store that remembers processed webhook event IDs.
+
+    A shared store (Redis `SET key 1 NX EX ttl`, Firestore create ...) lets
+    every function instance see events handled by the others.
+    """
+
+    def mark_seen(self, event_id):
+        """Records event_id, returns False if it had already been recorded."""
+        raise NotImplementedError
+
+    def forget(self, event_id):
+        """Drops event_id again so a redelivery of a failed event is processed."""
+        raise NotImplementedError
+
+
+class InMemoryDedupStore(DedupStore):
+    def __init__(self, max_size=EVENT_DEDUP_MAX_SIZE, ttl_seconds=EVENT_DEDUP_TTL_SECONDS):
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def mark_seen(self, event_id):
+        return self._cache.add(event_id)
+
+    def forget(self, event_id):
+        self._cache.pop(event_id)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class EventDeduplicator:
+    def __init__(self, store=None):
+        self._store = store or InMemoryDedupStore()
+        self.skipped = 0
+
+    def is_duplicate(self, event):
+        event_id = getattr(event, "webhook_event_id", None)
+        if not event_id:
+            return False
+
+        first_time = self._store.mark_seen(event_id)
+        delivery_context = getattr(event, "delivery_context", None)
+        is_redelivery = getattr(delivery_context, "is_redelivery", False)
+        if first_time:
+            if is_redelivery:
+                logger.info(f"Redelivered event {event_id} was not seen before")
+            return False
+
+        self.skipped += 1
+        logger.info(f"Skipping duplicate event {event_id} (redelivery={is_redelivery})")
+        return True
+
+    def forget(self, event):
+        """Called when the handler failed, so LINE's retry is not skipped."""
+        event_id = getattr(event, "webhook_event_id", None)
+        if event_id:
+            self._store.forget(event_id)
@@ -0,0 +1,149 @@
+import os
+import queue
+import logging
+import threading
+
+from linebot.v3.webhooks import MessageEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+EVENT_WORKER_CONCURRENCY = int(os.environ.get("EVENT_WORKER_CONCURRENCY", "8"))
+EVENT_QUEUE_MAX_DEPTH = int(os.environ.get("EVENT_QUEUE_MAX_DEPTH", "1000"))
+
+
+def dispatch_event(handler, event):
+    """Runs the @handler.add function registered for a single webhook event.
+
+    Mirrors the lookup done by WebhookHandler.handle so events can be
+    processed one at a time outside of the request thread.
+    """
+    func = None
+    if isinstance(event, MessageEvent):
+        key = f"{event.__class__.__name__}_{event.message.__class__.__name__}"
+        func = handler._handlers.get(key)
+
+    if func is None:
+        key = event.__class__.__name__
+        func = handler._handlers.get(key)
+
+    if func is None:
+        func = handler._default
+
+    if func is None:
+        logger.info(f"No handler of {key} and no default handler")
+        return
+
+    func(event)
+
+
+class EventQueueBackend:
+    """Interface for the queue that sits between callback and the workers.
+
+    A durable backend (Pub/Sub, Cloud Tasks, Redis ...) should serialize
+    events with `event.to_json()` and rebuild them with `Event.from_json`.
+    """
+
+    def put(self, item):
+        """Enqueues an item, raises queue.Full when the backend is full."""
+        raise NotImplementedError
+
+    def get(self, timeout=None):
+        """Blocks for the next item, raises queue.Empty on timeout."""
+        raise NotImplementedError
+
+    def task_done(self):
+        pass
+
+    def qsize(self):
+        raise NotImplementedError
+
+
+class InMemoryEventQueue(EventQueueBackend):
+    def __init__(self, max_depth=EVENT_QUEUE_MAX_DEPTH):
+        self._queue = queue.Queue(maxsize=max_depth)
+
+    def put(self, item):
+        self._queue.put_nowait(item)
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+    def task_done(self):
+        self._queue.task_done()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+class EventWorkerPool:
+    """Pool of daemon threads that run webhook handlers off the request path."""
+
+    def __init__(self, process, backend=None, concurrency=EVENT_WORKER_CONCURRENCY):
+        self._process = process
+        self._backend = backend or InMemoryEventQueue()
+        self._concurrency = concurrency
+        self._threads = []
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._processed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for idx in range(self._concurrency):
+                thread = threading.Thread(
+                    target=self._run, name=f"event-worker-{idx}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, item):
+        """Queues an item, returns False when the queue is full."""
+        self.start()
+        try:
+            self._backend.put(item)
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            return False
+        return True
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "queue_depth": self._backend.qsize(),
+                "in_flight": self._in_flight,
+                "processed": self._processed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "workers": len(self._threads),
+            }
+
+    def _run(self):
+        while True:
+            try:
+                item = self._backend.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            with self._lock:
+                self._in_flight += 1
+            try:
+                self._process(item)
+                failed = False
+            except Exception as e:
+                logger.exception(f"Event worker failed: {e}")
+                failed = True
+            finally:
+                self._backend.task_done()
+
+            with self._lock:
+                self._in_flight -= 1
+                self._processed += 1
+                if failed:
+                    self._failed += 1
@@ -1,162 +1,99 @@
-import json
-
 from linebot.v3.messaging import (
     ReplyMessageRequest,
     TextMessage,
-    FlexContainer,
     FlexMessage,
     FlexCarousel,
+    FlexContainer,
+    FlexBubble,
+    FlexBox,
+    FlexText,
+    FlexSeparator,
 )
 
+from commons.flex_templates import render_template
+
+
+# Keys tried, in order, for each placeholder of templates/flex_product_bubble.json
+PRODUCT_FIELDS = {
+    "PRODUCT_NAME": ("name", "product_name", "title"),
+    "PRODUCT_PRICE": ("price", "product_price"),
+    "PRODUCT_SKU": ("sku", "product_sku", "id"),
+    "PRODUCT_IMAGE_URL": ("image_url", "imageUrl", "image"),
+}
+MAX_CAROUSEL_BUBBLES = 12
+
+# Static parts of the fund bubble, built once and shared by every bubble
+SEPARATOR = FlexSeparator(margin="md")
+LABEL_STYLE = {"size": "sm", "color": "#555555", "flex": 2}
+VALUE_STYLE = {"size": "sm", "align": "end", "flex": 3}
+NAV_LABEL = FlexText(text="NAV", **LABEL_STYLE)
+RETURN_1D_LABEL = FlexText(text="เปลี่ยนแปลง (1D)", **LABEL_STYLE)
+RETURN_YTD_LABEL = FlexText(text="ผลตอบแทน YTD", **LABEL_STYLE)
+RISK_LABEL = FlexText(text="Risk Level", **LABEL_STYLE)
+
+
+def _fund_row(label, value, color="#111111"):
+    return FlexBox(
+        layout="horizontal",
+        contents=[label, FlexText(text=value, color=color, **VALUE_STYLE)],
+    )
+
+
+def build_fund_bubble(fund_data):
+    return1D_color = "#FF5555" if fund_data["return1D"] < 0 else "#00AA00"
+    returnYTD_color = "#FF5555" if fund_data["returnYTD"] < 0 else "#00AA00"
+    risk = fund_data.get("riskSpectrum")
+    if risk is None:
+        # Funds without a risk level in the ranking snapshot
+        risk_text = "-"
+    else:
+        risk_text = f"{risk} (สูง)" if risk >= 5 else f"{risk} (ปานกลาง)"
+    nav_date = str(fund_data["NAVDate"])
+
+    return FlexBubble(
+        body=FlexBox(
+            layout="vertical",
+            contents=[
+                FlexText(text=fund_data["fundCode"], weight="bold", size="lg", wrap=True),
+                FlexText(text=fund_data["fundNameThai"], size="sm", color="#666666", wrap=True),
+                SEPARATOR,
+                FlexBox(
+                    layout="vertical",
+                    margin="md",
+                    spacing="sm",
+                    contents=[
+                        _fund_row(NAV_LABEL, f"{fund_data['NAV']} บาท"),
+                        _fund_row(RETURN_1D_LABEL, f"{fund_data['return1D']}%", return1D_color),
+                        _fund_row(RETURN_YTD_LABEL, f"{fund_data['returnYTD']}%", returnYTD_color),
+                        _fund_row(RISK_LABEL, risk_text),
+                    ],
+                ),
+                SEPARATOR,
+                FlexBox(
+                    layout="horizontal",
+                    margin="md",
+                    contents=[
+                        FlexText(
+                            text=f"ข้อมูล ณ วันที่ {nav_date[:4]}-{nav_date[4:6]}-{nav_date[6:]}",
+                            size="xs",
+                            color="#999999",
+                            flex=1,
+                            align="start",
+                        )
+                    ],
+                ),
+            ],
+        )
+    )
+
 
 def build_fund_flex_message(
     line_bot_api, event, response_dict, search_query, additional_explain=None
 ):
-    result_products_list = []
-    for idx, result in enumerate(response_dict["results"]):
-        fund_data = result["document"]["structData"]
-        return1D_color = "#FF5555" if fund_data["return1D"] < 0 else "#00AA00"
-        returnYTD_color = "#FF5555" if fund_data["returnYTD"] < 0 else "#00AA00"
-
-        flex_message = {
-            "type": "bubble",
-            "body": {
-                "type": "box",
-                "layout": "vertical",
-                "contents": [
-                    {
-                        "type": "text",
-                        "text": fund_data["fundCode"],
-                        "weight": "bold",
-                        "size": "lg",
-                        "wrap": True,
-                    },
-                    {
-                        "type": "text",
-                        "text": fund_data["fundNameThai"],
-                        "size": "sm",
-                        "color": "#666666",
-                        "wrap": True,
-                    },
-                    {"type": "separator", "margin": "md"},
-                    {
-                        "type": "box",
-                        "layout": "vertical",
-                        "margin": "md",
-                        "spacing": "sm",
-                        "contents": [
-                            {
-                                "type": "box",
-                                "layout": "horizontal",
-                                "contents": [
-                                    {
-                                        "type": "text",
-                                        "text": "NAV",
-                                        "size": "sm",
-                                        "color": "#555555",
-                                        "flex": 2,
-                                    },
-                                    {
-                                        "type": "text",
-                                        "text": f"{fund_data['NAV']} บาท",
-                                        "size": "sm",
-                                        "color": "#111111",
-                                        "align": "end",
-                                        "flex": 3,
-                                    },
-                                ],
-                            },
-                            {
-                                "type": "box",
-                                "layout": "horizontal",
-                                "contents": [
-                                    {
-                                        "type": "text",
-                                        "text": "เปลี่ยนแปลง (1D)",
-                                        "size": "sm",
-                                        "color": "#555555",
-                                        "flex": 2,
-                                    },
-                                    {
-                                        "type": "text",
-                                        "text": f"{fund_data['return1D']}%",
-                                        "size": "sm",
-                                        "color": return1D_color,
-                                        "align": "end",
-                                        "flex": 3,
-                                    },
-                                ],
-                            },
-                            {
-                                "type": "box",
-                                "layout": "horizontal",
-                                "contents": [
-                                    {
-                                        "type": "text",
-                                        "text": "ผลตอบแทน YTD",
-                                        "size": "sm",
-                                        "color": "#555555",
-                                        "flex": 2,
-                                    },
-                                    {
-                                        "type": "text",
-                                        "text": f"{fund_data['returnYTD']}%",
-                                        "size": "sm",
-                                        "color": returnYTD_color,
-                                        "align": "end",
-                                        "flex": 3,
-                                    },
-                                ],
-                            },
-                            {
-                                "type": "box",
-                                "layout": "horizontal",
-                                "contents": [
-                                    {
-                                        "type": "text",
-                                        "text": "Risk Level",
-                                        "size": "sm",
-                                        "color": "#555555",
-                                        "flex": 2,
-                                    },
-                                    {
-                                        "type": "text",
-                                        "text": (
-                                            f"{fund_data['riskSpectrum']} (สูง)"
-                                            if fund_data["riskSpectrum"] >= 5
-                                            else f"{fund_data['riskSpectrum']} (ปานกลาง)"
-                                        ),
-                                        "size": "sm",
-                                        "color": "#111111",
-                                        "align": "end",
-                                        "flex": 3,
-                                    },
-                                ],
-                            },
-                        ],
-                    },
-                    {"type": "separator", "margin": "md"},
-                    {
-                        "type": "box",
-                        "layout": "horizontal",
-                        "margin": "md",
-                        "contents": [
-                            {
-                                "type": "text",
-                                "text": f"ข้อมูล ณ วันที่ {str(fund_data['NAVDate'])[:4]}-{str(fund_data['NAVDate'])[4:6]}-{str(fund_data['NAVDate'])[6:]}",
-                                "size": "xs",
-                                "color": "#999999",
-                                "flex": 1,
-                                "align": "start",
-                            }
-                        ],
-                    },
-                ],
-            },
-        }
-
-        json_object = json.dumps(flex_message)
-        result_products_list.append(FlexContainer.from_json(json_object))
+    result_products_list = [
+        build_fund_bubble(result["document"]["structData"])
+        for result in response_dict["results"]
+    ]
 
     carousel_flex_message = FlexMessage(
         alt_text=f"ผลการค้นหาสินค้า: {search_query}",
@@ -173,3 +110,27 @@ def build_fund_flex_message(
     line_bot_api.reply_message(
         ReplyMessageRequest(reply_token=event.reply_token, messages=messages_list)
     )
+
+
+def _product_values(product, number):
+    values = {"PRODUCT_NUMBER": number}
+    for placeholder, keys in PRODUCT_FIELDS.items():
+        values[placeholder] = next(
+            (product[key] for key in keys if product.get(key) is not None), ""
+        )
+    return values
+
+
+def build_products_search_result_carousel(search_result):
+    """Renders the Dialogflow CX search_result list as a product carousel."""
+    products = search_result[:MAX_CAROUSEL_BUBBLES]
+    bubbles = [
+        FlexContainer.from_dict(
+            render_template("flex_product_bubble", _product_values(product, idx + 1))
+        )
+        for idx, product in enumerate(products)
+    ]
+    return FlexMessage(
+        alt_text=f"ผลการค้นหาสินค้า {len(bubbles)} รายการ",
+        contents=FlexCarousel(type="carousel", contents=bubbles),
+    )
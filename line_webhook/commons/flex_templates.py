@@ -0,0 +1,113 @@
+import os
+import re
+import json
+from urllib.parse import quote
+
+
+TEMPLATES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates"
+)
+PLACEHOLDER = re.compile(r"<([A-Z0-9_]+)>")
+
+# Compiled node kinds
+CONST, DICT, LIST, TEXT = range(4)
+# Which placeholders of a string are URL-encoded
+ENCODE_NONE, ENCODE_ALL, ENCODE_QUERY = range(3)
+
+
+def _field_encoding(parent, key):
+    """Postback data is encoded whole; a URI only inside its query string.
+
+    A placeholder standing for the whole URI, or its scheme/host/path, is
+    substituted as is so the link stays valid.
+    """
+    action_type = parent.get("type")
+    if key == "data" and action_type == "postback":
+        return ENCODE_ALL
+    if key == "uri" and action_type == "uri":
+        return ENCODE_QUERY
+    return ENCODE_NONE
+
+
+def compile_node(node, encoding=ENCODE_NONE):
+    """Compiles a parsed JSON template into a tree of render instructions.
+
+    Subtrees without placeholders compile to CONST and are shared between
+    renders instead of being copied.
+    """
+    if isinstance(node, str):
+        parts = PLACEHOLDER.split(node)
+        if len(parts) == 1:
+            return (CONST, node)
+        # parts alternates literal text and placeholder names; segments are
+        # (is_placeholder, text, url_encode)
+        segments = []
+        for idx, part in enumerate(parts):
+            if idx % 2 == 0:
+                if part:
+                    segments.append((False, part, False))
+                continue
+            in_query = "?" in "".join(parts[:idx:2])
+            url_encode = encoding == ENCODE_ALL or (encoding == ENCODE_QUERY and in_query)
+            segments.append((True, part, url_encode))
+        return (TEXT, segments)
+
+    if isinstance(node, dict):
+        static, dynamic = {}, []
+        for key, value in node.items():
+            compiled = compile_node(value, _field_encoding(node, key))
+            if compiled[0] == CONST:
+                static[key] = value
+            else:
+                dynamic.append((key, compiled))
+        if not dynamic:
+            return (CONST, node)
+        return (DICT, (static, dynamic))
+
+    if isinstance(node, list):
+        compiled = [compile_node(value) for value in node]
+        if all(kind == CONST for kind, _ in compiled):
+            return (CONST, node)
+        return (LIST, compiled)
+
+    return (CONST, node)
+
+
+def render_node(compiled, values):
+    kind, payload = compiled
+    if kind == CONST:
+        return payload
+    if kind == TEXT:
+        out = []
+        for is_placeholder, part, url_encode in payload:
+            if is_placeholder:
+                value = str(values.get(part, ""))
+                out.append(quote(value, safe="") if url_encode else value)
+            else:
+                out.append(part)
+        return "".join(out)
+    if kind == DICT:
+        static, dynamic = payload
+        result = dict(static)
+        for key, child in dynamic:
+            result[key] = render_node(child, values)
+        return result
+    return [render_node(child, values) for child in payload]
+
+
+def load_templates(directory=TEMPLATES_DIR):
+    templates = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".json"):
+            with open(os.path.join(directory, filename), "r", encoding="utf-8") as f:
+                templates[filename[: -len(".json")]] = compile_node(json.load(f))
+    return templates
+
+
+# Loaded and compiled once per process
+TEMPLATES = load_templates()
+
+
+def render_template(name, values):
+    """Renders a compiled template into a dict, values maps placeholder -> value."""
+    return render_node(TEMPLATES[name], values)
@@ -0,0 +1,158 @@
+import os
+import re
+import json
+import threading
+
+import numpy as np
+
+from commons.fund_index import to_response_dict
+
+
+FUND_COLUMNS_DIR = os.environ.get("FUND_COLUMNS_DIR", "privates/fund_columns")
+
+NUMERIC_COLUMNS = {
+    "NAV": np.float64,
+    "return1D": np.float64,
+    "returnYTD": np.float64,
+    "riskSpectrum": np.int8,
+    "NAVDate": np.int32,
+}
+LABEL_COLUMNS = ["fundCode", "fundNameThai"]
+# Integer columns have no NaN: a fund without a riskSpectrum is stored as -1
+MISSING_INT = -1
+LABELS_FILE = "labels.json"
+
+SORT_KEYWORDS = {"ytd": "returnYTD", "1d": "return1D", "nav": "NAV", "risk": "riskSpectrum"}
+# Sorted lowest first, everything else highest first
+ASCENDING_SORTS = {"riskSpectrum"}
+RANKING_PATTERN = re.compile(
+    r"(?:top\s*(?P<top_k>\d+))|(?:risk\s*(?P<op><=|≤|<)\s*(?P<risk>\d))|(?P<sort>ytd|1d|nav|risk)",
+    re.IGNORECASE,
+)
+
+
+def export_fund_columns(records, directory=FUND_COLUMNS_DIR):
+    """Writes fund structData as one .npy file per numeric column."""
+    os.makedirs(directory, exist_ok=True)
+    for column, dtype in NUMERIC_COLUMNS.items():
+        fill = np.nan if np.issubdtype(dtype, np.floating) else MISSING_INT
+        values = np.array(
+            [float(r[column]) if r.get(column) is not None else fill for r in records]
+        ).astype(dtype)
+        tmp_path = os.path.join(directory, f"{column}.tmp.npy")
+        np.save(tmp_path, values)
+        os.replace(tmp_path, os.path.join(directory, f"{column}.npy"))
+
+    # Labels are written last, readers reload when this file changes
+    labels = {column: [r.get(column, "") for r in records] for column in LABEL_COLUMNS}
+    tmp_path = os.path.join(directory, LABELS_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(labels, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(directory, LABELS_FILE))
+
+
+class FundColumns:
+    """Read-only, memory-mapped columnar fund snapshot with top-k queries.
+
+    Memory-mapped pages come from the OS page cache, so every worker process
+    on the host shares one copy of the data.
+    """
+
+    def __init__(self, directory=FUND_COLUMNS_DIR):
+        self.columns = {
+            column: np.load(os.path.join(directory, f"{column}.npy"), mmap_mode="r")
+            for column in NUMERIC_COLUMNS
+        }
+        with open(os.path.join(directory, LABELS_FILE), "r", encoding="utf-8") as f:
+            self.labels = json.load(f)
+
+    def __len__(self):
+        return len(self.columns["NAV"])
+
+    def query(self, sort_by="returnYTD", descending=True, top_k=5, max_risk=None, min_risk=None):
+        """Returns the row indices of the top_k funds that pass the filters."""
+        values = self.columns[sort_by]
+        mask = np.ones(len(values), dtype=bool)
+        if np.issubdtype(values.dtype, np.floating):
+            mask &= ~np.isnan(values)
+        else:
+            mask &= values != MISSING_INT
+        risk = self.columns["riskSpectrum"]
+        if max_risk is not None or min_risk is not None:
+            mask &= risk != MISSING_INT
+        if max_risk is not None:
+            mask &= risk <= max_risk
+        if min_risk is not None:
+            mask &= risk >= min_risk
+
+        candidates = np.flatnonzero(mask)
+        if len(candidates) == 0:
+            return candidates
+        keys = -values[candidates] if descending else values[candidates]
+        if top_k < len(candidates):
+            part = np.argpartition(keys, top_k - 1)[:top_k]
+            candidates, keys = candidates[part], keys[part]
+        return candidates[np.argsort(keys, kind="stable")]
+
+    def records(self, indices):
+        """Rebuilds structData dicts for the given rows."""
+        records = []
+        for idx in indices:
+            record = {column: self.labels[column][idx] for column in LABEL_COLUMNS}
+            for column, values in self.columns.items():
+                value = values[idx].item()
+                record[column] = None if value == MISSING_INT and isinstance(value, int) else value
+            records.append(record)
+        return records
+
+
+def parse_ranking_query(text):
+    """Parses e.g. "top 5 risk<=4 ytd" into FundColumns.query kwargs."""
+    kwargs = {}
+    for match in RANKING_PATTERN.finditer(text):
+        if match.group("top_k"):
+            kwargs["top_k"] = max(1, min(int(match.group("top_k")), 10))
+        elif match.group("risk"):
+            risk = int(match.group("risk"))
+            kwargs["max_risk"] = risk - 1 if match.group("op") == "<" else risk
+        elif match.group("sort"):
+            kwargs["sort_by"] = SORT_KEYWORDS[match.group("sort").lower()]
+            kwargs["descending"] = kwargs["sort_by"] not in ASCENDING_SORTS
+    return kwargs
+
+
+_fund_columns = None
+_fund_columns_mtime = None
+_fund_columns_lock = threading.Lock()
+
+
+def get_fund_columns(directory=FUND_COLUMNS_DIR):
+    """Returns the loaded snapshot, reloading it after a new export."""
+    global _fund_columns, _fund_columns_mtime
+    try:
+        mtime = os.stat(os.path.join(directory, LABELS_FILE)).st_mtime
+    except FileNotFoundError:
+        return None
+    if mtime != _fund_columns_mtime:
+        with _fund_columns_lock:
+            if mtime != _fund_columns_mtime:
+                _fund_columns = FundColumns(directory)
+                _fund_columns_mtime = mtime
+    return _fund_columns
+
+
+def rank_funds(text):
+    """Answers ranking questions from the local snapshot, None if unavailable."""
+    fund_columns = get_fund_columns()
+    if fund_columns is None:
+        return None
+    kwargs = parse_ranking_query(text)
+    records = fund_columns.records(fund_columns.query(**kwargs))
+    if not records:
+        return to_response_dict([], "ไม่พบกองทุนที่ตรงกับเงื่อนไข")
+
+    sort_by = kwargs.get("sort_by", "returnYTD")
+    summary_text = f"กองทุน {len(records)} อันดับแรกเรียงตาม {sort_by}"
+    if "max_risk" in kwargs:
+        summary_text += f" ที่มีความเสี่ยงไม่เกินระดับ {kwargs['max_risk']}"
+    return to_response_dict(records, summary_text)
@@ -0,0 +1,152 @@
+import os
+import json
+import threading
+
+from commons.thai_text import normalize_thai, char_ngrams
+
+
+FUND_SNAPSHOT_PATH = os.environ.get("FUND_SNAPSHOT_PATH", "privates/fund_snapshot.ndjson")
+FUND_NAME_MATCH_THRESHOLD = float(os.environ.get("FUND_NAME_MATCH_THRESHOLD", "0.75"))
+MAX_LOCAL_RESULTS = 10
+
+
+def load_fund_records(path=FUND_SNAPSHOT_PATH):
+    """Reads fund structData records from an NDJSON snapshot."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def to_response_dict(records, summary_text):
+    """Wraps structData records like a Vertex AI Search response."""
+    return {
+        "results": [{"document": {"structData": record}} for record in records],
+        "summary": {"summaryText": summary_text},
+    }
+
+
+def normalize_code(code):
+    return "".join(code.split()).upper()
+
+
+class FundIndex:
+    """Local index over fund codes (prefix trie) and Thai names (n-grams)."""
+
+    def __init__(self, records):
+        self.records = records
+        self._trie = {}
+        self._names = {}
+        self._name_grams = []
+        self._postings = {}
+        for idx, record in enumerate(records):
+            self._add_code(normalize_code(record.get("fundCode", "")), idx)
+            self._add_name(normalize_thai(record.get("fundNameThai", "")), idx)
+
+    def _add_code(self, code, idx):
+        if not code:
+            return
+        node = self._trie
+        for char in code:
+            node = node.setdefault(char, {})
+        node.setdefault("$", []).append(idx)
+
+    def _add_name(self, name, idx):
+        grams = char_ngrams(name)
+        self._name_grams.append(grams)
+        if not name:
+            return
+        self._names.setdefault(name, []).append(idx)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(idx)
+
+    def _code_node(self, code):
+        node = self._trie
+        for char in code:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+    def lookup_code(self, query, limit=MAX_LOCAL_RESULTS):
+        code = normalize_code(query)
+        node = self._code_node(code) if code else None
+        if node is None:
+            return []
+        if "$" in node:
+            return node["$"]
+
+        # Unique-enough prefix, e.g. "K-US" -> K-USA, K-USXNDQ
+        matches = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char == "$":
+                    matches.extend(child)
+                else:
+                    stack.append(child)
+            if len(matches) > limit:
+                return []
+        return sorted(matches, key=lambda idx: self.records[idx].get("fundCode", ""))
+
+    def lookup_name(self, query, limit=MAX_LOCAL_RESULTS, threshold=FUND_NAME_MATCH_THRESHOLD):
+        name = normalize_thai(query)
+        if name in self._names:
+            return self._names[name]
+
+        grams = char_ngrams(name)
+        if not grams:
+            return []
+        overlap = {}
+        for gram in grams:
+            for idx in self._postings.get(gram, ()):
+                overlap[idx] = overlap.get(idx, 0) + 1
+
+        scored = []
+        for idx, common in overlap.items():
+            dice = 2 * common / (len(grams) + len(self._name_grams[idx]))
+            if dice >= threshold:
+                scored.append((dice, idx))
+        scored.sort(reverse=True)
+        return [idx for _, idx in scored[:limit]]
+
+    def lookup(self, query):
+        """Returns matching structData records, or [] for free-text queries."""
+        query = query.strip()
+        if not query:
+            return []
+        indices = []
+        if query.isascii() and " " not in query:
+            indices = self.lookup_code(query)
+        if not indices:
+            indices = self.lookup_name(query)
+        return [self.records[idx] for idx in indices]
+
+
+_fund_index = None
+_fund_index_lock = threading.Lock()
+
+
+def get_fund_index():
+    """Loads the index from FUND_SNAPSHOT_PATH once, returns None if missing."""
+    global _fund_index
+    if _fund_index is None:
+        with _fund_index_lock:
+            if _fund_index is None:
+                if not os.path.exists(FUND_SNAPSHOT_PATH):
+                    return None
+                _fund_index = FundIndex(load_fund_records())
+    return _fund_index
+
+
+def local_fund_lookup(search_query):
+    """Answers exact or near-exact fund code/name queries without Vertex AI Search."""
+    fund_index = get_fund_index()
+    if fund_index is None:
+        return None
+    records = fund_index.lookup(search_query)
+    if not records:
+        return None
+    summary_text = "\n".join(
+        f"{record.get('fundCode', '')}: {record.get('fundNameThai', '')}" for record in records
+    )
+    return to_response_dict(records, summary_text)
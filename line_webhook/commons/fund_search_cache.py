@@ -0,0 +1,93 @@
+import os
+import threading
+import unicodedata
+
+from commons.ttl_cache import TTLCache
+from commons.vertex_agent_search import vertex_search_fund
+
+
+FUND_SEARCH_CACHE_MAX_SIZE = int(os.environ.get("FUND_SEARCH_CACHE_MAX_SIZE", "512"))
+FUND_SEARCH_CACHE_TTL_SECONDS = int(os.environ.get("FUND_SEARCH_CACHE_TTL_SECONDS", str(6 * 3600)))
+
+
+def normalize_query(search_query):
+    text = unicodedata.normalize("NFC", search_query).casefold()
+    return " ".join(text.split())
+
+
+def fund_nav_dates(response_dict):
+    """Returns {fundCode: NAVDate as YYYYMMDD int} for the results that have both."""
+    nav_dates = {}
+    for result in response_dict.get("results", []):
+        struct_data = result.get("document", {}).get("structData", {})
+        fund_code, nav_date = struct_data.get("fundCode"), struct_data.get("NAVDate")
+        if fund_code and nav_date:
+            nav_dates[fund_code] = int(float(nav_date))
+    return nav_dates
+
+
+class FundSearchCache:
+    """TTL/LRU cache around vertex_search_fund.
+
+    Every entry remembers the NAVDate of each fund it was built from, and
+    the cache tracks the newest NAVDate seen per fund. An entry is stale
+    once one of its own funds shows up with a newer NAVDate, so funds whose
+    NAV lags (FIF funds at T-1) do not invalidate entries of other funds.
+    Results without a NAVDate only expire by TTL.
+    """
+
+    def __init__(
+        self,
+        search=vertex_search_fund,
+        max_size=FUND_SEARCH_CACHE_MAX_SIZE,
+        ttl_seconds=FUND_SEARCH_CACHE_TTL_SECONDS,
+    ):
+        self._search = search
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self._latest_nav_dates = {}
+        self.nav_invalidations = 0
+
+    def observe_nav_dates(self, nav_dates):
+        with self._lock:
+            for fund_code, nav_date in nav_dates.items():
+                if nav_date > self._latest_nav_dates.get(fund_code, 0):
+                    self._latest_nav_dates[fund_code] = nav_date
+
+    def is_stale(self, nav_dates):
+        with self._lock:
+            return any(
+                self._latest_nav_dates.get(fund_code, 0) > nav_date
+                for fund_code, nav_date in nav_dates.items()
+            )
+
+    def search(self, search_query):
+        key = normalize_query(search_query)
+        entry = self._cache.get(key)
+        if entry is not None:
+            nav_dates, response_dict = entry
+            if not self.is_stale(nav_dates):
+                return response_dict
+            self._cache.pop(key)
+            with self._lock:
+                self.nav_invalidations += 1
+
+        response_dict = self._search(search_query)
+        nav_dates = fund_nav_dates(response_dict)
+        self.observe_nav_dates(nav_dates)
+        self._cache.set(key, (nav_dates, response_dict))
+        return response_dict
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats["nav_invalidations"] = self.nav_invalidations
+        with self._lock:
+            stats["latest_nav_date"] = max(self._latest_nav_dates.values(), default=0)
+        return stats
+
+
+fund_search_cache = FundSearchCache()
+
+
+def cached_vertex_search_fund(search_query):
+    return fund_search_cache.search(search_query)
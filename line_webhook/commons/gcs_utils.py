@@ -1,21 +1,103 @@
 import os
-from google.cloud import storage
+import logging
+
+from commons.client_registry import get_storage_client
+
+
+logger = logging.getLogger(__name__)
+
+# GCS resumable uploads need chunk sizes that are multiples of 256 KiB
+GCS_STREAM_CHUNK_SIZE = int(os.environ.get("GCS_STREAM_CHUNK_SIZE", str(1024 * 1024)))
+LINE_DATA_API_HOST = "https://api-data.line.me"
+LINE_CONTENT_READ_SIZE = int(os.environ.get("LINE_CONTENT_READ_SIZE", str(64 * 1024)))
+
+EXTENSIONS = {"image": "jpg", "audio": "m4a", "video": "mp4"}
+CONTENT_TYPES = {"image": "image/jpeg", "audio": "audio/x-m4a", "video": "video/mp4"}
 
 
 def upload_blob_from_memory(contents, type, user_id, message_id):
     """Uploads a file to the bucket."""
     bucket_name = os.environ["GCS_BUCKET_STORAGE"]
-    storage_client = storage.Client()
+    storage_client = get_storage_client()
     bucket = storage_client.bucket(bucket_name)
 
-    if type == "image":
-        ext = "jpg"
-    if type == "audio":
-        ext = "m4a"
-
-    destination_blob_name = f"LINE_USERS/{user_id}/{type}/{message_id}.{ext}"
+    destination_blob_name = f"LINE_USERS/{user_id}/{type}/{message_id}.{EXTENSIONS[type]}"
     blob = bucket.blob(destination_blob_name)
     blob.upload_from_string(contents)
 
     gsc_image_path = "gs://{}/{}".format(bucket_name, destination_blob_name)
     return gsc_image_path
+
+
+def upload_blob_from_stream(chunks, type, user_id, message_id, chunk_size=GCS_STREAM_CHUNK_SIZE):
+    """Writes an iterable of byte chunks to a GCS resumable upload.
+
+    At most chunk_size bytes are buffered, however large the payload is.
+    The object is only committed once chunks is exhausted; if it raises,
+    the upload is cancelled and the error re-raised.
+    """
+    bucket_name = os.environ["GCS_BUCKET_STORAGE"]
+    bucket = get_storage_client().bucket(bucket_name)
+
+    destination_blob_name = f"LINE_USERS/{user_id}/{type}/{message_id}.{EXTENSIONS[type]}"
+    blob = bucket.blob(destination_blob_name)
+    # Not a with block: BlobWriter.close() uploads the last chunk and
+    # commits the object, which must not happen for a truncated payload
+    writer = blob.open("wb", chunk_size=chunk_size, content_type=CONTENT_TYPES[type])
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+    except BaseException:
+        abandon_upload(writer)
+        raise
+    writer.close()
+
+    return "gs://{}/{}".format(bucket_name, destination_blob_name)
+
+
+def abandon_upload(writer):
+    """Cancels a BlobWriter's resumable session without committing the object."""
+    # Closing only the buffer makes close(), and so IOBase.__del__, a no-op
+    writer._buffer.close()
+    if not writer._upload_and_transport:
+        return
+    upload, transport = writer._upload_and_transport
+    try:
+        # GCS answers 499 to a cancelled resumable upload
+        transport.request("DELETE", upload.resumable_url)
+    except Exception as e:
+        logger.warning(f"Could not cancel resumable upload: {e}")
+
+
+def iter_message_content(line_bot_blob_api, message_id, read_size=LINE_CONTENT_READ_SIZE):
+    """Yields LINE message content in chunks as it arrives.
+
+    MessagingApiBlob.get_message_content always reads the whole body, so the
+    request goes through the SDK's connection pool with preload disabled.
+    """
+    api_client = line_bot_blob_api.api_client
+    configuration = api_client.configuration
+    response = api_client.rest_client.pool_manager.request(
+        "GET",
+        f"{LINE_DATA_API_HOST}/v2/bot/message/{message_id}/content",
+        headers={"Authorization": f"Bearer {configuration.access_token}"},
+        preload_content=False,
+    )
+    try:
+        if not 200 <= response.status <= 299:
+            raise RuntimeError(
+                f"Getting content of message {message_id} failed with HTTP {response.status}"
+            )
+        yield from response.stream(read_size)
+    finally:
+        response.release_conn()
+
+
+def stream_message_content_to_gcs(line_bot_blob_api, type, user_id, message_id):
+    """Copies LINE message content into GCS without holding it all in memory."""
+    return upload_blob_from_stream(
+        iter_message_content(line_bot_blob_api, message_id),
+        type=type,
+        user_id=user_id,
+        message_id=message_id,
+    )
@@ -1,41 +1,100 @@
 from commons.dialogflowcx_answer import detect_intent_text
-from commons.vertex_agent_search import vertex_search_fund
+from commons.fund_search_cache import cached_vertex_search_fund, fund_search_cache
+from commons.fund_index import local_fund_lookup
+from commons.fund_columns import rank_funds
 from commons.flex_message_builder import build_fund_flex_message
 from commons.call_crewai_api import crewai_analyze_news
+from commons.keyword_router import router
+from commons.intent_classifier import classify_intent
+
+# Registers the local fast-path handlers (calculators, FAQs) on the router
+from commons.local_handlers import answer_intent
 from linebot.v3.messaging import (
     ReplyMessageRequest,
     TextMessage
 )
 
 
-def handle_text_by_keyword(event, line_bot_api):
-    text = event.message.text
-    if text.startswith("#กองทุน") or text.startswith("#fund"):
-        search_query = text[len("#กองทุน") :].strip()
-        search_query = text[len("#fund") :].strip()
-        response_dict = vertex_search_fund(search_query)
-        build_fund_flex_message(
-            line_bot_api=line_bot_api,
-            event=event,
-            response_dict=response_dict,
-            search_query=search_query,
-        )
-    elif text == "#analyse_ข่าวการเงิน":
-        crewai_analyze_news(event.source.user_id)
+@router.prefix("#top_fund", "#กองทุนเด่น", name="fund_ranking")
+def handle_fund_ranking(event, line_bot_api, text, query):
+    # Ranking questions, e.g. "#top_fund top 5 risk<=4 ytd"
+    response_dict = rank_funds(text)
+    if response_dict is None:
+        response_dict = cached_vertex_search_fund(query)
+    # MessageToDict drops empty fields, so "results" is missing without hits
+    if not response_dict.get("results"):
+        summary_text = response_dict.get("summary", {}).get("summaryText") or "ไม่พบกองทุนที่ตรงกับเงื่อนไขค่ะ"
         line_bot_api.reply_message(
             ReplyMessageRequest(
-                reply_token=event.reply_token, messages=[TextMessage(text="กำลังวิเคราะห์ข่าวการเงิน ซึ่งอาจใช้เวลาสักครู่ ฉันจะแจ้งเมื่อเสร็จสิ้น คุณสามารถสอบถามเรื่องอื่นได้เลย")]
+                reply_token=event.reply_token,
+                messages=[TextMessage(text=summary_text)],
             )
-        ) 
+        )
+        return
+    build_fund_flex_message(
+        line_bot_api=line_bot_api,
+        event=event,
+        response_dict=response_dict,
+        search_query=text,
+    )
+
+
+@router.prefix("#กองทุน", "#fund", name="fund_search")
+def handle_fund_search(event, line_bot_api, text, search_query):
+    # Fund codes and Thai names are answered from the local index
+    response_dict = local_fund_lookup(search_query)
+    if response_dict is None:
+        response_dict = cached_vertex_search_fund(search_query)
+        print("Fund search cache:", fund_search_cache.stats())
+    build_fund_flex_message(
+        line_bot_api=line_bot_api,
+        event=event,
+        response_dict=response_dict,
+        search_query=search_query,
+    )
+
+
+@router.exact("#analyse_ข่าวการเงิน", name="crewai_news")
+def handle_analyse_news(event, line_bot_api, text, arg):
+    job = crewai_analyze_news(event.source.user_id)
+    if job is None:
+        reply = "ขออภัยค่ะ ไม่สามารถเริ่มวิเคราะห์ข่าวการเงินได้ในขณะนี้ กรุณาลองใหม่อีกครั้งค่ะ"
+    elif job.get("attached"):
+        reply = "กำลังวิเคราะห์ข่าวการเงินที่คุณขอไว้แล้ว ฉันจะแจ้งเมื่อเสร็จสิ้น"
     else:
-        from datetime import datetime
-        currentDateAndTime = datetime.now()
-        currentTime = currentDateAndTime.strftime("%Y%m%d%H")
-        session_id = f"{event.source.user_id}_line_{currentTime}"
-        print("session_ID", session_id)
-        detect_intent_text(
-            text=text,
-            session_id=session_id,
-            line_bot_api=line_bot_api,
-            reply_token=event.reply_token,
+        reply = "กำลังวิเคราะห์ข่าวการเงิน ซึ่งอาจใช้เวลาสักครู่ ฉันจะแจ้งเมื่อเสร็จสิ้น คุณสามารถสอบถามเรื่องอื่นได้เลย"
+    line_bot_api.reply_message(
+        ReplyMessageRequest(
+            reply_token=event.reply_token, messages=[TextMessage(text=reply)]
         )
+    )
+
+
+@router.fallback(name="free_text")
+def handle_dialogflow_cx(event, line_bot_api, text, arg):
+    # Obvious tax, retirement and fund questions skip the CX round-trip
+    intent = classify_intent(text)
+    if intent is not None and answer_intent(intent, event, line_bot_api, text):
+        router.record(f"intent_{intent}")
+        return
+    router.record("cx_call")
+
+    from datetime import datetime
+    currentDateAndTime = datetime.now()
+    currentTime = currentDateAndTime.strftime("%Y%m%d%H")
+    session_id = f"{event.source.user_id}_line_{currentTime}"
+    print("session_ID", session_id)
+    detect_intent_text(
+        text=text,
+        session_id=session_id,
+        line_bot_api=line_bot_api,
+        reply_token=event.reply_token,
+        event_timestamp=event.timestamp,
+    )
+
+
+def handle_text_by_keyword(event, line_bot_api, text=None):
+    if text is None:
+        text = event.message.text
+    router.dispatch(event, line_bot_api, text)
+    print("Route hits:", router.stats())
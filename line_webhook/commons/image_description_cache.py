@@ -0,0 +1,177 @@
+import io
+import os
+import json
+import time
+import hashlib
+import logging
+
+from google.api_core.exceptions import NotFound
+
+from commons.ttl_cache import TTLCache
+from commons.client_registry import get_storage_client
+from commons.gemini_image_understanding import gemini_describe_image
+
+
+logger = logging.getLogger(__name__)
+
+
+IMAGE_DESCRIPTION_CACHE_MAX_SIZE = int(os.environ.get("IMAGE_DESCRIPTION_CACHE_MAX_SIZE", "2048"))
+IMAGE_DESCRIPTION_CACHE_TTL_SECONDS = int(os.environ.get("IMAGE_DESCRIPTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# "gcs" keeps descriptions across restarts and function instances
+IMAGE_DESCRIPTION_CACHE_BACKEND = os.environ.get("IMAGE_DESCRIPTION_CACHE_BACKEND", "memory")
+IMAGE_DESCRIPTION_PHASH = os.environ.get("IMAGE_DESCRIPTION_PHASH", "false").lower() == "true"
+# Max differing bits (out of 64) for two images to count as the same picture
+IMAGE_DESCRIPTION_PHASH_DISTANCE = int(os.environ.get("IMAGE_DESCRIPTION_PHASH_DISTANCE", "6"))
+
+
+def content_hash(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def perceptual_hash(image_bytes):
+    """64-bit difference hash, stable across re-compression and resizing."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        pixels = list(image.convert("L").resize((9, 8)).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+class DescriptionCacheBackend:
+    """Interface for a persistent store of image descriptions."""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, description, ttl_seconds):
+        raise NotImplementedError
+
+
+class GCSDescriptionBackend(DescriptionCacheBackend):
+    """Stores descriptions as JSON objects next to the archived images."""
+
+    def __init__(self, bucket_name=None, prefix="CACHE/image_descriptions"):
+        self.bucket_name = bucket_name or os.environ["GCS_BUCKET_STORAGE"]
+        self.prefix = prefix
+
+    def _blob(self, key):
+        bucket = get_storage_client().bucket(self.bucket_name)
+        return bucket.blob(f"{self.prefix}/{key}.json")
+
+    def get(self, key):
+        # One round-trip: no exists() check before the download
+        try:
+            entry = json.loads(self._blob(key).download_as_text())
+        except NotFound:
+            return None
+        if entry["expires_at"] < time.time():
+            return None
+        return entry["description"]
+
+    def set(self, key, description, ttl_seconds):
+        entry = {"expires_at": time.time() + ttl_seconds, "description": description}
+        self._blob(key).upload_from_string(
+            json.dumps(entry, ensure_ascii=False), content_type="application/json"
+        )
+
+
+class ImageDescriptionCache:
+    """Caches Gemini product descriptions by image content hash.
+
+    Lookups go to memory first, then the optional persistent backend, then
+    (when enabled) a perceptual-hash scan that catches recompressed copies.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        use_phash=IMAGE_DESCRIPTION_PHASH,
+        max_distance=IMAGE_DESCRIPTION_PHASH_DISTANCE,
+        max_size=IMAGE_DESCRIPTION_CACHE_MAX_SIZE,
+        ttl_seconds=IMAGE_DESCRIPTION_CACHE_TTL_SECONDS,
+    ):
+        self.backend = backend
+        self.use_phash = use_phash
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self._memory = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._phashes = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def _find_similar(self, phash):
+        best_key, best_distance = None, self.max_distance + 1
+        for other_phash, key in self._phashes.items():
+            distance = bin(phash ^ other_phash).count("1")
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        return best_key
+
+    def lookup(self, image_bytes):
+        """Returns (description or None, content key, perceptual hash)."""
+        key = content_hash(image_bytes)
+        description = self._memory.get(key)
+        if description is None and self.backend is not None:
+            try:
+                description = self.backend.get(key)
+            except Exception as e:
+                logger.warning(f"Could not read cached image description: {e}")
+            if description is not None:
+                self._memory.set(key, description)
+
+        phash = None
+        if description is None and self.use_phash:
+            try:
+                phash = perceptual_hash(image_bytes)
+            except Exception as e:
+                logger.warning(f"Could not compute perceptual hash: {e}")
+            else:
+                similar_key = self._find_similar(phash)
+                if similar_key is not None:
+                    description = self._memory.get(similar_key)
+                    if description is not None:
+                        self._memory.set(key, description)
+        return description, key, phash
+
+    def store(self, key, description, phash=None):
+        self._memory.set(key, description)
+        if phash is not None:
+            self._phashes.set(phash, key)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, description, self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Could not persist image description: {e}")
+
+    def stats(self):
+        return self._memory.stats()
+
+
+image_description_cache = ImageDescriptionCache(
+    backend=GCSDescriptionBackend() if IMAGE_DESCRIPTION_CACHE_BACKEND == "gcs" else None
+)
+
+
+def describe_image_cached(user_id, message_id, image_bytes, model_bytes=None, mime_type="image/jpeg"):
+    """gemini_describe_image, skipping the model for images seen before.
+
+    The cache is keyed on image_bytes (the LINE original); model_bytes, when
+    given, is the pre-processed copy sent to Gemini on a miss.
+    """
+    description, key, phash = image_description_cache.lookup(image_bytes)
+    if description is not None:
+        return description
+
+    description = gemini_describe_image(
+        user_id=user_id,
+        message_id=message_id,
+        image_bytes=image_bytes if model_bytes is None else model_bytes,
+        mime_type=mime_type,
+    )
+    if description is not None:
+        image_description_cache.store(key, description, phash)
+    return description
@@ -0,0 +1,28 @@
+import io
+import os
+
+from PIL import Image, ImageOps
+
+
+IMAGE_PREPROCESS = os.environ.get("IMAGE_PREPROCESS", "true").lower() == "true"
+IMAGE_MAX_SIDE = int(os.environ.get("IMAGE_MAX_SIDE", "1024"))
+IMAGE_JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", "85"))
+# Archive the untouched LINE original instead of the pre-processed copy
+IMAGE_ARCHIVE_ORIGINAL = os.environ.get("IMAGE_ARCHIVE_ORIGINAL", "true").lower() == "true"
+
+
+def preprocess_image(image_bytes, max_side=IMAGE_MAX_SIDE, quality=IMAGE_JPEG_QUALITY):
+    """Downscales to max_side, drops EXIF/ICC metadata and re-encodes as JPEG."""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        # Let the JPEG decoder scale down by DCT while decoding, much cheaper
+        # than decoding the full-resolution original
+        image.draft("RGB", (max_side, max_side))
+        # Apply the EXIF orientation before the metadata is dropped
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
@@ -0,0 +1,116 @@
+import os
+import re
+import threading
+
+import numpy as np
+
+from commons.thai_text import normalize_thai, char_ngrams
+
+
+INTENT_EXAMPLES_PATH = os.environ.get("INTENT_EXAMPLES_PATH", "data/intent_examples.tsv")
+INTENT_MIN_CONFIDENCE = float(os.environ.get("INTENT_MIN_CONFIDENCE", "0.8"))
+NGRAM_SIZES = (1, 2, 3)
+DIGITS = re.compile(r"\d+")
+
+
+def load_examples(path=INTENT_EXAMPLES_PATH):
+    """Reads (label, text) pairs from a tab separated file, # starts a comment."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            label, text = line.split("\t", 1)
+            examples.append((label, text))
+    return examples
+
+
+def features(text):
+    # Amounts and ages vary per message, only their presence is a signal
+    text = DIGITS.sub("0", normalize_thai(text, keep_spaces=True))
+    grams = set()
+    for n in NGRAM_SIZES:
+        grams |= char_ngrams(text, n)
+    return grams
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over character n-grams.
+
+    Weights are kept as one row per n-gram so classifying a message is a sum
+    of the rows of its n-grams and a softmax, unknown n-grams are skipped.
+    """
+
+    def __init__(self, labels, vocabulary, weights, bias):
+        self.labels = labels
+        self._rows = {gram: weights[i] for gram, i in vocabulary.items()}
+        self._bias = bias
+
+    @classmethod
+    def train(cls, examples, epochs=300, learning_rate=0.5, l2=1e-3):
+        labels = sorted({label for label, _ in examples})
+        label_ids = {label: i for i, label in enumerate(labels)}
+        example_grams = [features(text) for _, text in examples]
+        vocabulary = {}
+        for grams in example_grams:
+            for gram in grams:
+                vocabulary.setdefault(gram, len(vocabulary))
+
+        x = np.zeros((len(examples), len(vocabulary)), dtype=np.float32)
+        for row, grams in enumerate(example_grams):
+            x[row, [vocabulary[gram] for gram in grams]] = 1.0
+        y = np.zeros((len(examples), len(labels)), dtype=np.float32)
+        y[np.arange(len(examples)), [label_ids[label] for label, _ in examples]] = 1.0
+
+        weights = np.zeros((len(vocabulary), len(labels)), dtype=np.float32)
+        bias = np.zeros(len(labels), dtype=np.float32)
+        for _ in range(epochs):
+            probabilities = _softmax(x @ weights + bias)
+            error = (probabilities - y) / len(examples)
+            weights -= learning_rate * (x.T @ error + l2 * weights)
+            bias -= learning_rate * error.sum(axis=0)
+        return cls(labels, vocabulary, weights, bias)
+
+    def predict(self, text):
+        """Returns (label, probability) of the most likely intent."""
+        scores = self._bias.copy()
+        for gram in features(text):
+            row = self._rows.get(gram)
+            if row is not None:
+                scores += row
+        probabilities = _softmax(scores)
+        best = int(probabilities.argmax())
+        return self.labels[best], float(probabilities[best])
+
+
+def _softmax(scores):
+    exp = np.exp(scores - scores.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+_intent_classifier = None
+_intent_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier():
+    """Trains the classifier from INTENT_EXAMPLES_PATH once, returns None if missing."""
+    global _intent_classifier
+    if _intent_classifier is None:
+        with _intent_classifier_lock:
+            if _intent_classifier is None:
+                if not os.path.exists(INTENT_EXAMPLES_PATH):
+                    return None
+                _intent_classifier = IntentClassifier.train(load_examples())
+    return _intent_classifier
+
+
+def classify_intent(text, min_confidence=INTENT_MIN_CONFIDENCE):
+    """Returns the intent label when the classifier is confident, otherwise None."""
+    classifier = get_intent_classifier()
+    if classifier is None:
+        return None
+    label, probability = classifier.predict(text)
+    if probability < min_confidence:
+        return None
+    return label
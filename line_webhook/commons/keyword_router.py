@@ -0,0 +1,105 @@
+import re
+import threading
+
+
+class Route:
+    def __init__(self, name, handler):
+        self.name = name
+        self.handler = handler
+
+
+class KeywordRouter:
+    """Routes text messages to handlers by exact command, prefix or regex.
+
+    Exact commands are a dict lookup and prefixes a walk over a character
+    trie (longest prefix wins), so both cost O(length of the message).
+    Regex routes are tried in registration order after that, then the
+    fallback. Handlers are called as handler(event, line_bot_api, text, arg)
+    where arg is the text after the prefix, the regex match or None.
+    """
+
+    def __init__(self):
+        self._exact = {}
+        self._trie = {}
+        self._patterns = []
+        self._fallback = None
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def exact(self, *commands, name=None):
+        def register(handler):
+            route = Route(name or handler.__name__, handler)
+            for command in commands:
+                self._exact[command] = route
+            return handler
+
+        return register
+
+    def prefix(self, *prefixes, name=None):
+        def register(handler):
+            route = Route(name or handler.__name__, handler)
+            for prefix in prefixes:
+                node = self._trie
+                for char in prefix:
+                    node = node.setdefault(char, {})
+                node[None] = (prefix, route)
+            return handler
+
+        return register
+
+    def pattern(self, regex, name=None, flags=0):
+        def register(handler):
+            self._patterns.append((re.compile(regex, flags), Route(name or handler.__name__, handler)))
+            return handler
+
+        return register
+
+    def fallback(self, name=None):
+        def register(handler):
+            self._fallback = Route(name or handler.__name__, handler)
+            return handler
+
+        return register
+
+    def resolve(self, text):
+        """Returns (route, arg) for text, route is None if nothing matches."""
+        route = self._exact.get(text)
+        if route is not None:
+            return route, None
+
+        node, longest = self._trie, None
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                longest = node[None]
+        if longest is not None:
+            prefix, route = longest
+            return route, text[len(prefix) :].strip()
+
+        for regex, route in self._patterns:
+            match = regex.search(text)
+            if match:
+                return route, match
+
+        return self._fallback, None
+
+    def dispatch(self, event, line_bot_api, text):
+        route, arg = self.resolve(text)
+        if route is None:
+            return None
+        self.record(route.name)
+        return route.handler(event, line_bot_api, text, arg)
+
+    def record(self, name):
+        """Counts a hit, also used by handlers that route further themselves."""
+        with self._lock:
+            self._hits[name] = self._hits.get(name, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._hits)
+
+
+router = KeywordRouter()
@@ -0,0 +1,192 @@
+import os
+import re
+import json
+
+from linebot.v3.messaging import ReplyMessageRequest, TextMessage
+
+from commons.keyword_router import router
+from commons.thai_text import THAI_DIGITS
+from commons.fund_index import local_fund_lookup
+from commons.flex_message_builder import build_fund_flex_message
+from commons.financial_calculators import (
+    calculate_personal_income_tax,
+    calculate_retirement_plan,
+)
+
+
+FAQ_PATH = os.environ.get("FAQ_PATH", "privates/faq.json")
+
+# "50k" is 50,000; any other letter glued to the number ("50m") is not understood
+NUMBER = r"\s*(?:=|:)?\s*(\d[\d,]*(?:\.\d+)?)(k?)(?![a-z\d])"
+TAX_FIELDS = {
+    "monthly_income": [r"เงินเดือน", r"รายได้(?:ต่อเดือน)?", r"income", r"salary"],
+    "num_children": [r"บุตร", r"ลูก", r"children"],
+    "insurance_premium": [r"เบี้ยประกัน(?:ชีวิต)?", r"ประกันชีวิต", r"insurance"],
+    "social_security": [r"ประกันสังคม", r"social security"],
+}
+RETIREMENT_FIELDS = {
+    "current_age": [r"(?<!เกษียณ)(?<!ตอน)อายุ(?!ขัย)(?:ปัจจุบัน)?", r"(?<!retirement )age"],
+    "retirement_age": [r"เกษียณ(?:ตอน)?(?:อายุ)?", r"retire(?:ment)?(?: age)?"],
+    "life_expectancy": [r"อายุขัย", r"life expectancy"],
+    "monthly_expenses": [r"ค่าใช้จ่าย(?:ต่อเดือน)?", r"expenses?"],
+    "current_savings": [r"เงินออม(?:ปัจจุบัน)?", r"savings?"],
+    "investment_return": [r"ผลตอบแทน", r"return"],
+    "monthly_saving_to_invest": [r"(?:ออม|ลงทุน)เดือนละ", r"monthly invest"],
+}
+RETIREMENT_DEFAULTS = {
+    "life_expectancy": 85,
+    "current_savings": 0,
+    "investment_return": 5,
+    "monthly_saving_to_invest": 0,
+}
+INT_FIELDS = {"num_children", "current_age", "retirement_age", "life_expectancy"}
+# Code-shaped tokens only (K-GBRAND, SCBSET50), so English words around them are skipped
+FUND_CODE = re.compile(r"(?<![\w&\-])(?!(?:FUND|NAV|INFO)(?![\w&\-]))[A-Z][A-Z0-9&\-]*[A-Z0-9](?![\w&\-])")
+# Longest first, so "ของ" is not stripped as "ขอ" + "ง"
+LEADING_FUND_WORDS = ["ขอ", "ดู", "ข้อมูล", "รายละเอียด", "ราคา", "หน่วยลงทุน", "nav", "ของ", "กองทุนรวม", "กองทุน"]
+FUND_WORDS = re.compile(
+    r"^(?:" + "|".join(sorted(LEADING_FUND_WORDS, key=len, reverse=True)) + r"|\s)+", re.IGNORECASE
+)
+
+
+def _extract(text, fields):
+    text = text.translate(THAI_DIGITS).lower()
+    params = {}
+    for field, keywords in fields.items():
+        for keyword in keywords:
+            match = re.search(keyword + NUMBER, text)
+            if match:
+                value = float(match.group(1).replace(",", ""))
+                if match.group(2):
+                    value *= 1000
+                params[field] = int(value) if field in INT_FIELDS else value
+                break
+    return params
+
+
+def extract_tax_params(text, bare_number=False):
+    """Returns calculate_personal_income_tax kwargs, or None without an income.
+
+    bare_number reads a leading number without an income keyword as the
+    monthly income, only meant for the "#ภาษี 50000" command: in free text
+    a number is as likely a year ("ภาษีปี 2566").
+    """
+    params = _extract(text, TAX_FIELDS)
+    if "monthly_income" not in params:
+        if not bare_number:
+            return None
+        income = _extract(text, {"monthly_income": [r"^"]})
+        if not income:
+            return None
+        params.update(income)
+    return params
+
+
+def extract_retirement_params(text):
+    """Returns calculate_retirement_plan kwargs, or None if required values are missing."""
+    params = _extract(text, RETIREMENT_FIELDS)
+    if not {"current_age", "retirement_age", "monthly_expenses"} <= params.keys():
+        return None
+    return {**RETIREMENT_DEFAULTS, **params}
+
+
+def extract_fund_query(text):
+    """Returns the fund code, or the text without leading fund words as a name query."""
+    match = FUND_CODE.search(text)
+    if match:
+        return match.group(0)
+    return FUND_WORDS.sub("", text).strip()
+
+
+def format_tax_reply(params):
+    tax, total_deductions, gross_income = calculate_personal_income_tax(**params)
+    return (
+        f"รายได้ทั้งปี {gross_income:,.2f} บาท\n"
+        f"ค่าลดหย่อนรวม {total_deductions:,.2f} บาท\n"
+        f"ภาษีที่ต้องชำระ {tax:,.2f} บาท"
+    )
+
+
+def format_retirement_reply(params):
+    plan = calculate_retirement_plan(**params)
+    if plan is None:
+        return "ข้อมูลไม่ถูกต้อง กรุณาตรวจสอบอายุและจำนวนเงินอีกครั้งค่ะ"
+    status = "ทำได้ตามแผน" if plan["status"] == "achievable" else "ควรทบทวนแผน"
+    return (
+        f"เงินที่ต้องมี ณ วันเกษียณ {plan['required_savings']:,.2f} บาท\n"
+        f"ต้องเก็บเพิ่ม {plan['additional_savings_needed']:,.2f} บาท\n"
+        f"ควรออมเดือนละ {plan['monthly_savings_required']:,.2f} บาท\n"
+        f"สถานะ: {status}"
+    )
+
+
+def reply_text(event, line_bot_api, text):
+    line_bot_api.reply_message(
+        ReplyMessageRequest(reply_token=event.reply_token, messages=[TextMessage(text=text)])
+    )
+
+
+@router.prefix("#ภาษี", "#tax", name="tax_calculator")
+def handle_tax(event, line_bot_api, text, arg):
+    params = extract_tax_params(arg, bare_number=True)
+    if params is None:
+        reply_text(event, line_bot_api, "กรุณาระบุเงินเดือน เช่น #ภาษี เงินเดือน 50000 บุตร 1 ประกันสังคม 9000")
+        return
+    reply_text(event, line_bot_api, format_tax_reply(params))
+
+
+@router.prefix("#เกษียณ", "#retire", name="retirement_calculator")
+def handle_retirement(event, line_bot_api, text, arg):
+    params = extract_retirement_params(arg)
+    if params is None:
+        reply_text(
+            event,
+            line_bot_api,
+            "กรุณาระบุ อายุ, เกษียณตอนอายุ และค่าใช้จ่ายต่อเดือน เช่น "
+            "#เกษียณ อายุ 30 เกษียณตอนอายุ 60 ค่าใช้จ่าย 30000 เงินออม 100000",
+        )
+        return
+    reply_text(event, line_bot_api, format_retirement_reply(params))
+
+
+def answer_intent(intent, event, line_bot_api, text):
+    """Answers a classified free-text message locally, False if CX is still needed."""
+    if intent == "tax":
+        params = extract_tax_params(text)
+        if params is None:
+            return False
+        reply_text(event, line_bot_api, format_tax_reply(params))
+    elif intent == "retirement":
+        params = extract_retirement_params(text)
+        if params is None:
+            return False
+        reply_text(event, line_bot_api, format_retirement_reply(params))
+    elif intent == "fund":
+        search_query = extract_fund_query(text)
+        response_dict = local_fund_lookup(search_query) if search_query else None
+        if response_dict is None:
+            return False
+        build_fund_flex_message(
+            line_bot_api=line_bot_api,
+            event=event,
+            response_dict=response_dict,
+            search_query=search_query,
+        )
+    else:
+        return False
+    return True
+
+
+def register_faq_routes(path=FAQ_PATH):
+    """Registers exact-match FAQ answers from a {"question": "answer"} JSON file."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        faq = json.load(f)
+    for question, answer in faq.items():
+        router.exact(question, name="faq")(
+            lambda event, line_bot_api, text, arg, answer=answer: reply_text(event, line_bot_api, answer)
+        )
+
+
+register_faq_routes()
@@ -0,0 +1,180 @@
+import os
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+from collections import deque
+
+from commons.gcs_utils import upload_blob_from_memory
+
+
+logger = logging.getLogger(__name__)
+
+
+MEDIA_ARCHIVER_QUEUE_SIZE = int(os.environ.get("MEDIA_ARCHIVER_QUEUE_SIZE", "256"))
+MEDIA_ARCHIVER_WORKERS = int(os.environ.get("MEDIA_ARCHIVER_WORKERS", "4"))
+MEDIA_ARCHIVER_MAX_RETRIES = int(os.environ.get("MEDIA_ARCHIVER_MAX_RETRIES", "5"))
+MEDIA_ARCHIVER_BACKOFF_SECONDS = float(os.environ.get("MEDIA_ARCHIVER_BACKOFF_SECONDS", "0.5"))
+MEDIA_ARCHIVER_SPILL_DIR = os.environ.get("MEDIA_ARCHIVER_SPILL_DIR", "/tmp/media_archiver")
+MEDIA_ARCHIVER_SHUTDOWN_TIMEOUT = float(os.environ.get("MEDIA_ARCHIVER_SHUTDOWN_TIMEOUT", "10"))
+
+
+class MediaArchiver:
+    """Uploads user media to GCS on background threads.
+
+    Uploads are queued in memory and retried with exponential backoff. When
+    the queue is full they are spilled to local disk and picked up again once
+    the workers are idle. Pending uploads are flushed at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        upload=upload_blob_from_memory,
+        max_queue_size=MEDIA_ARCHIVER_QUEUE_SIZE,
+        workers=MEDIA_ARCHIVER_WORKERS,
+        max_retries=MEDIA_ARCHIVER_MAX_RETRIES,
+        backoff_seconds=MEDIA_ARCHIVER_BACKOFF_SECONDS,
+        spill_dir=MEDIA_ARCHIVER_SPILL_DIR,
+    ):
+        self._upload = upload
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._workers = workers
+        self._max_retries = max_retries
+        self._backoff_seconds = backoff_seconds
+        self._spill_dir = spill_dir
+        self._threads = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self.uploaded = 0
+        self.failed = 0
+        self.retries = 0
+        self.spilled = 0
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for idx in range(self._workers):
+                thread = threading.Thread(
+                    target=self._run, name=f"media-archiver-{idx}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def archive(self, contents, type, user_id, message_id):
+        """Queues an upload, spilling it to disk if the queue is full."""
+        self.start()
+        item = {"contents": contents, "type": type, "user_id": user_id, "message_id": message_id}
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._spill(item)
+
+    def _spill(self, item):
+        os.makedirs(self._spill_dir, exist_ok=True)
+        path = os.path.join(self._spill_dir, f"{item['type']}__{item['user_id']}__{item['message_id']}")
+        with open(path + ".tmp", "wb") as f:
+            f.write(item["contents"])
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            self.spilled += 1
+        logger.warning(f"Archive queue full, spilled {path}")
+
+    def _spilled_files(self):
+        try:
+            names = os.listdir(self._spill_dir)
+        except FileNotFoundError:
+            return []
+        return [name for name in names if not name.endswith((".tmp", ".claimed"))]
+
+    def _load_spilled(self):
+        """Claims one spilled file, returns it as a queue item or None."""
+        for name in self._spilled_files():
+            path = os.path.join(self._spill_dir, name)
+            claimed = path + ".claimed"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                # Another worker claimed it first
+                continue
+            with open(claimed, "rb") as f:
+                contents = f.read()
+            os.remove(claimed)
+            type, user_id, message_id = name.split("__", 2)
+            return {"contents": contents, "type": type, "user_id": user_id, "message_id": message_id}
+        return None
+
+    def _upload_with_retry(self, item):
+        start = time.perf_counter()
+        for attempt in range(self._max_retries + 1):
+            try:
+                self._upload(**item)
+                break
+            except Exception as e:
+                if attempt == self._max_retries:
+                    with self._lock:
+                        self.failed += 1
+                    logger.error(f"Archiving {item['type']} {item['message_id']} failed: {e}")
+                    return
+                with self._lock:
+                    self.retries += 1
+                delay = self._backoff_seconds * 2**attempt
+                time.sleep(delay + random.uniform(0, delay))
+        with self._lock:
+            self.uploaded += 1
+            self._latencies.append(time.perf_counter() - start)
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=1)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                item = self._load_spilled()
+                if item is not None:
+                    self._upload_with_retry(item)
+                continue
+            try:
+                self._upload_with_retry(item)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Blocks until queued and spilled uploads have been attempted."""
+        self._queue.join()
+        item = self._load_spilled()
+        while item is not None:
+            self._upload_with_retry(item)
+            item = self._load_spilled()
+
+    def shutdown(self, timeout=MEDIA_ARCHIVER_SHUTDOWN_TIMEOUT):
+        if not self._threads:
+            return
+        flusher = threading.Thread(target=self.flush, daemon=True)
+        flusher.start()
+        flusher.join(timeout)
+        self._stopping.set()
+
+    def metrics(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = {
+                "queue_depth": self._queue.qsize(),
+                "spilled_pending": len(self._spilled_files()),
+                "uploaded": self.uploaded,
+                "failed": self.failed,
+                "retries": self.retries,
+                "spilled": self.spilled,
+            }
+        if latencies:
+            metrics["upload_latency_p50"] = latencies[len(latencies) // 2]
+            metrics["upload_latency_p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return metrics
+
+
+media_archiver = MediaArchiver()
+atexit.register(media_archiver.shutdown)
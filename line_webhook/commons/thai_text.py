@@ -0,0 +1,23 @@
+import re
+import unicodedata
+
+# Tone marks, mai taikhu, thanthakhat and similar combining signs that users
+# often leave out or type inconsistently
+THAI_DIACRITICS = re.compile("[็-๎]")
+THAI_DIGITS = str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_thai(text, strip_diacritics=True, keep_spaces=False):
+    """Normalizes Thai/English text for matching."""
+    text = unicodedata.normalize("NFC", text).casefold().translate(THAI_DIGITS)
+    if strip_diacritics:
+        text = THAI_DIACRITICS.sub("", text)
+    return WHITESPACE.sub(" " if keep_spaces else "", text).strip()
+
+
+def char_ngrams(text, n=3):
+    """Returns the set of character n-grams, Thai has no word boundaries."""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
@@ -0,0 +1,89 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, max_size=1024, ttl_seconds=300, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _lookup(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[0] <= now:
+            del self._data[key]
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        return item
+
+    def _store(self, key, value, ttl_seconds, now):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._data[key] = (now + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._lookup(key, self._clock())
+            if item is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl_seconds=None):
+        with self._lock:
+            self._store(key, value, ttl_seconds, self._clock())
+
+    def add(self, key, value=True, ttl_seconds=None):
+        """Stores key only if it is absent, returns True when it was stored."""
+        with self._lock:
+            now = self._clock()
+            if self._lookup(key, now) is not None:
+                self.hits += 1
+                return False
+            self.misses += 1
+            self._store(key, value, ttl_seconds, now)
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[1]
+
+    def items(self):
+        """Returns a snapshot of the live (key, value) pairs, oldest first."""
+        with self._lock:
+            now = self._clock()
+            return [(k, v) for k, (expires, v) in self._data.items() if expires > now]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
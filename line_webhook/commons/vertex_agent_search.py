@@ -1,9 +1,10 @@
 import os
 from typing import List
-from google.api_core.client_options import ClientOptions
 from google.cloud import discoveryengine_v1 as discoveryengine
 from google.protobuf.json_format import MessageToDict
 
+from commons.client_registry import get_search_client
+
 
 def vertex_search_fund(
     search_query: str,
@@ -15,13 +16,7 @@ def vertex_search_fund(
     VERTEX_ENGINE = os.environ["VERTEX_SEARCH_AGENT_ID"]
     APP_LOCATION = os.environ["VERTEX_SEARCH_LOCATION"]
 
-    client_options = (
-        ClientOptions(api_endpoint=f"{APP_LOCATION}-discoveryengine.googleapis.com")
-        if APP_LOCATION != "global"
-        else None
-    )
-
-    client = discoveryengine.SearchServiceClient(client_options=client_options)
+    client = get_search_client(APP_LOCATION)
     serving_config = (
         f"projects/{GCP_PROJECT_ID}/locations/{APP_LOCATION}"
         f"/collections/default_collection/engines/{VERTEX_ENGINE}"
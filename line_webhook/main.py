@@ -1,7 +1,11 @@
 import os
 import logging
+import tempfile
+import subprocess
 import functions_framework
 
+from google.api_core.exceptions import GoogleAPICallError
+
 from linebot.v3 import WebhookHandler
 from linebot.v3.exceptions import InvalidSignatureError
 from linebot.v3.webhooks import (
@@ -36,9 +40,19 @@ from linebot.v3.messaging import (
 )
 
 
-from commons.gcs_utils import upload_blob_from_memory
-from commons.gemini_image_understanding import gemini_describe_image
+from commons.gcs_utils import iter_message_content, upload_blob_from_stream
+from commons.media_archiver import media_archiver
+from commons.audio_transcription import audio_transcriber, TranscriptionBusyError
+from commons.image_description_cache import describe_image_cached
+from commons.image_preprocess import (
+    IMAGE_PREPROCESS,
+    IMAGE_ARCHIVE_ORIGINAL,
+    preprocess_image,
+)
 from commons.handler_text import handle_text_by_keyword
+from commons.event_queue import EventWorkerPool, dispatch_event
+from commons.event_dispatcher import ParallelEventDispatcher, group_events_by_source
+from commons.event_dedup import EventDeduplicator
 
 
 # Configure logging
@@ -48,6 +62,11 @@ logger = logging.getLogger(__name__)
 
 CHANNEL_ACCESS_TOKEN = os.environ["CHANNEL_ACCESS_TOKEN"]
 CHANNEL_SECRET = os.environ["CHANNEL_SECRET"]
+# Acknowledge the webhook right away and run handlers on background workers.
+# Requires the function to keep CPU allocated after the response is sent.
+ASYNC_EVENT_PROCESSING = (
+    os.environ.get("ASYNC_EVENT_PROCESSING", "false").lower() == "true"
+)
 
 
 configuration = Configuration(
@@ -60,6 +79,25 @@ api_client = ApiClient(configuration)
 line_bot_api = MessagingApi(api_client)
 line_bot_blob_api = MessagingApiBlob(api_client)
 
+event_deduplicator = EventDeduplicator()
+
+
+def handle_event(event):
+    # Redelivered events that were already processed cost only a lookup
+    if event_deduplicator.is_duplicate(event):
+        return
+    try:
+        dispatch_event(handler, event)
+    except Exception:
+        event_deduplicator.forget(event)
+        raise
+
+
+event_dispatcher = ParallelEventDispatcher(handle_event)
+# Queue items are per-user event lists; a user's lists from different
+# webhook bodies run one at a time, in the order they were dequeued
+event_worker_pool = EventWorkerPool(event_dispatcher.run_serialized)
+
 
 @functions_framework.http
 def callback(request):
@@ -76,7 +114,11 @@ def callback(request):
 
     # handle webhook body
     try:
-        handler.handle(body, signature)
+        payload = handler.parser.parse(body, signature, as_payload=True)
+        if ASYNC_EVENT_PROCESSING:
+            enqueue_events(payload.events)
+        else:
+            event_dispatcher.dispatch(payload.events)
     except InvalidSignatureError:
         print(
             "Invalid signature. Please check your channel access token/channel secret."
@@ -85,6 +127,15 @@ def callback(request):
     return "OK"
 
 
+def enqueue_events(events):
+    for group in group_events_by_source(events):
+        if not event_worker_pool.submit(group):
+            # Queue is full, fall back to handling the events in the request
+            logger.warning("Event queue is full, handling events inline")
+            event_dispatcher.run_serialized(group)
+    logger.info(f"Event queue metrics: {event_worker_pool.metrics()}")
+
+
 @handler.add(MessageEvent, message=TextMessageContent)
 def handle_text_message(event):
     line_bot_api.show_loading_animation_with_http_info(
@@ -100,19 +151,30 @@ def handle_image_message(event):
     )
 
     message_content = line_bot_blob_api.get_message_content(message_id=event.message.id)
-    upload_blob_from_memory(
-        contents=message_content,
+    processed_content = message_content
+    if IMAGE_PREPROCESS:
+        # Formats Pillow cannot decode (or decompression bombs) go to Gemini as sent
+        try:
+            processed_content = preprocess_image(message_content)
+        except Exception as e:
+            logger.warning(f"Could not preprocess image {event.message.id}, using the original: {e}")
+    # Archive to GCS in the background, Gemini reads the bytes inline
+    media_archiver.archive(
+        contents=message_content if IMAGE_ARCHIVE_ORIGINAL else processed_content,
         user_id=event.source.user_id,
         message_id=event.message.id,
         type="image",
     )
 
-    image_description = gemini_describe_image(
+    image_description = describe_image_cached(
         user_id=event.source.user_id,
         message_id=event.message.id,
+        image_bytes=message_content,
+        model_bytes=processed_content,
     )
 
-    print("Image description: " + image_description)
+    print("Image description: " + str(image_description))
+    logger.info(f"Media archiver metrics: {media_archiver.metrics()}")
 
 
 @handler.add(MessageEvent, message=AudioMessageContent)
@@ -120,15 +182,47 @@ def handle_audio_message(event):
     line_bot_api.show_loading_animation_with_http_info(
         ShowLoadingAnimationRequest(chat_id=event.source.user_id)
     )
-    audio_content = line_bot_blob_api.get_message_content(message_id=event.message.id)
-    upload_blob_from_memory(
-        contents=audio_content,
-        user_id=event.source.user_id,
-        message_id=event.message.id,
-        type="audio",
-    )
-
-    print("Audio content uploaded to GCS")
+    # Archive while the content arrives and spool a copy to disk for ffmpeg
+    with tempfile.NamedTemporaryFile(suffix=".m4a") as audio_file:
+
+        def spool(chunks):
+            for chunk in chunks:
+                audio_file.write(chunk)
+                yield chunk
+
+        upload_blob_from_stream(
+            spool(iter_message_content(line_bot_blob_api, event.message.id)),
+            user_id=event.source.user_id,
+            message_id=event.message.id,
+            type="audio",
+        )
+        audio_file.flush()
+        print("Audio content uploaded to GCS")
+
+        try:
+            transcript = audio_transcriber.transcribe(audio_file.name, event.source.user_id)
+        except TranscriptionBusyError:
+            line_bot_api.reply_message(
+                ReplyMessageRequest(
+                    reply_token=event.reply_token,
+                    messages=[TextMessage(text="กำลังถอดข้อความจากเสียงก่อนหน้าอยู่ค่ะ กรุณารอสักครู่แล้วส่งใหม่อีกครั้งค่ะ")],
+                )
+            )
+            return
+        except (subprocess.CalledProcessError, FileNotFoundError, GoogleAPICallError) as e:
+            logger.error(f"Could not transcribe audio message {event.message.id}: {e}")
+            transcript = None
+
+    if not transcript:
+        line_bot_api.reply_message(
+            ReplyMessageRequest(
+                reply_token=event.reply_token,
+                messages=[TextMessage(text="ขออภัยค่ะ ไม่สามารถถอดข้อความจากเสียงได้ กรุณาลองใหม่อีกครั้งค่ะ")],
+            )
+        )
+        return
+    print("Audio transcript: " + transcript)
+    handle_text_by_keyword(event, line_bot_api, text=transcript)
 
 
 @handler.add(MessageEvent, message=LocationMessageContent)
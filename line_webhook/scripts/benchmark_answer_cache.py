@@ -0,0 +1,80 @@
+"""Hit rate and lookup latency of the semantic CX answer cache.
+
+Fills the cache with one answer per FAQ-style question, then looks up
+reworded variants (spacing, tone marks, Thai digits, particles) and
+unrelated questions that must miss. Run from the line_webhook directory:
+    python scripts/benchmark_answer_cache.py [similarity]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commons.answer_cache import AnswerCache, ANSWER_CACHE_SIMILARITY
+
+QUESTIONS = [
+    "เปิดบัญชีกองทุนออนไลน์ต้องใช้เอกสารอะไรบ้าง",
+    "กองทุน SSF กับ RMF ต่างกันอย่างไร",
+    "ซื้อกองทุนขั้นต่ำกี่บาท",
+    "ขายกองทุนแล้วได้เงินกี่วัน",
+    "ลดหย่อนภาษีด้วยกองทุนได้สูงสุดเท่าไหร่",
+    "ค่าธรรมเนียมการซื้อขายกองทุนคิดอย่างไร",
+    "สับเปลี่ยนกองทุนทำได้ไหม",
+    "ความเสี่ยงระดับ 6 หมายถึงอะไร",
+    "คำนวณภาษี เงินเดือน 50000 บาท",
+    "ลดหย่อนภาษีด้วยกองทุนได้สูงสุดเท่าไหร่ ปี 2566",
+    "ลงทุนเดือนละ 5000 ได้เท่าไหร่",
+]
+VARIANTS = [
+    "เปิดบัญชีกองทุนออนไลน์ ต้องใช้เอกสารอะไรบ้างคะ",
+    "กองทุน ssf กับ rmf ต่างกันอย่างไรครับ",
+    "ซื้อกองทุนขั้นต่ำกี่บาทคะ",
+    "ขายกองทุนแล้ว ได้เงินกี่วันครับ",
+    "ลดหยอนภาษีดวยกองทุนไดสูงสุดเทาไหร",
+    "ค่าธรรมเนียม การซื้อขายกองทุน คิดอย่างไร",
+    "สับเปลี่ยนกองทุนทำได้ไหมคะ",
+    "ความเสี่ยงระดับ ๖ หมายถึงอะไร",
+    "คำนวณภาษี  เงินเดือน ๕๐๐๐๐ บาท",
+    "ลดหยอนภาษีดวยกองทุนไดสูงสุดเทาไหร ปี 2566",
+    "ลงทุนเดือนละ 5,000 ได้เท่าไหร่คะ",
+]
+UNRELATED = [
+    "กองทุนไหนผลตอบแทนดีที่สุดปีนี้",
+    "เปิดบัญชีเงินฝากออมทรัพย์ต้องใช้อะไร",
+    "ขายหุ้นแล้วได้เงินกี่วัน",
+    "ความเสี่ยงระดับ 4 หมายถึงอะไร",
+    # Same wording, different numbers: the cached answer would be wrong
+    "คำนวณภาษี เงินเดือน 500000 บาท",
+    "ลดหย่อนภาษีด้วยกองทุนได้สูงสุดเท่าไหร่ ปี 2567",
+    "ลงทุนเดือนละ 50000 ได้เท่าไหร่",
+]
+
+
+def main():
+    similarity = float(sys.argv[1]) if len(sys.argv) > 1 else ANSWER_CACHE_SIMILARITY
+    cache = AnswerCache(similarity=similarity)
+    for i, question in enumerate(QUESTIONS):
+        cache.set(question, [f"answer {i}"])
+    # Unrelated entries so lookups run against a realistically sized cache
+    for i in range(2000):
+        cache.set(f"คำถามอื่นหมายเลข {i} เกี่ยวกับเรื่องทั่วไป", [f"other {i}"])
+
+    rounds = 200
+    for name, texts, expected in (
+        ("exact", QUESTIONS, [[f"answer {i}"] for i in range(len(QUESTIONS))]),
+        ("reworded", VARIANTS, [[f"answer {i}"] for i in range(len(VARIANTS))]),
+        ("unrelated", UNRELATED, [None] * len(UNRELATED)),
+    ):
+        correct = sum(cache.get(text) == answer for text, answer in zip(texts, expected))
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                cache.get(text)
+        per_lookup = (time.perf_counter() - start) / (rounds * len(texts))
+        print(f"{name:10s} correct {correct}/{len(texts)}  {per_lookup * 1e6:.0f} us per lookup")
+    print("stats:", cache.stats())
+
+
+if __name__ == "__main__":
+    main()
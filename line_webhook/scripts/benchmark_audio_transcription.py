@@ -0,0 +1,43 @@
+"""Transcription wall-clock time for a long voice note, sequential vs parallel segments.
+
+Uses the local speech stand-in (no network, no ffmpeg). Run from the
+line_webhook directory:
+    python scripts/benchmark_audio_transcription.py --seconds 120 --real-time-factor 0.1
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commons.audio_transcription import (
+    AUDIO_BYTES_PER_SAMPLE,
+    AUDIO_SAMPLE_RATE,
+    AudioTranscriber,
+    LocalSpeechBackend,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--segment-seconds", type=float, default=15)
+    parser.add_argument("--real-time-factor", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    pcm = bytes(int(args.seconds * AUDIO_SAMPLE_RATE) * AUDIO_BYTES_PER_SAMPLE)
+    backend = LocalSpeechBackend(real_time_factor=args.real_time_factor)
+    print(f"{args.seconds:.0f}s note, {args.segment_seconds:.0f}s segments, speech backend at {args.real_time_factor}x real time")
+    for concurrency in (1, args.concurrency):
+        transcriber = AudioTranscriber(
+            backend=backend, concurrency=concurrency, segment_seconds=args.segment_seconds
+        )
+        start = time.perf_counter()
+        transcriber.transcribe_pcm(pcm)
+        print(f"concurrency {concurrency:>2}: {time.perf_counter() - start:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
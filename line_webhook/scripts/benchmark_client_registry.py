@@ -0,0 +1,119 @@
+"""Compares per-request latency with a new client per call and with the shared registry.
+
+Needs the same environment variables as the deployed function, e.g.
+CONVERSATIONAL_AGENT_*, VERTEX_SEARCH_* and GCS_BUCKET_STORAGE. Run from
+the line_webhook directory:
+    python scripts/benchmark_client_registry.py --iterations 10
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import dialogflowcx_v3beta1 as dialogflow
+from google.cloud import discoveryengine_v1 as discoveryengine
+from google.cloud import storage
+
+from commons import client_registry
+
+
+def sessions_request():
+    project_id = os.environ["CONVERSATIONAL_AGENT_PROJECT_ID"]
+    location_id = os.environ["CONVERSATIONAL_AGENT_LOCATION"]
+    agent_id = os.environ["CONVERSATIONAL_AGENT_ID"]
+    session = f"projects/{project_id}/locations/{location_id}/agents/{agent_id}/sessions/benchmark"
+    return dialogflow.DetectIntentRequest(
+        session=session,
+        query_input=dialogflow.QueryInput(
+            text=dialogflow.TextInput(text="สวัสดี"), language_code="th"
+        ),
+    )
+
+
+def search_request():
+    project_id = os.environ["VERTEX_SEARCH_PROJECT_ID"]
+    engine = os.environ["VERTEX_SEARCH_AGENT_ID"]
+    location = os.environ["VERTEX_SEARCH_LOCATION"]
+    return discoveryengine.SearchRequest(
+        serving_config=(
+            f"projects/{project_id}/locations/{location}"
+            f"/collections/default_collection/engines/{engine}"
+            f"/servingConfigs/default_config"
+        ),
+        query="K-USA",
+        page_size=5,
+    )
+
+
+def fresh_sessions_client():
+    location_id = os.environ["CONVERSATIONAL_AGENT_LOCATION"]
+    client_options = None
+    if location_id != "global":
+        client_options = {"api_endpoint": f"{location_id}-dialogflow.googleapis.com:443"}
+    return dialogflow.SessionsClient(client_options=client_options)
+
+
+def fresh_search_client():
+    location = os.environ["VERTEX_SEARCH_LOCATION"]
+    client_options = None
+    if location != "global":
+        client_options = {"api_endpoint": f"{location}-discoveryengine.googleapis.com"}
+    return discoveryengine.SearchServiceClient(client_options=client_options)
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, before, after):
+    print(
+        f"{name:<22} before: median {statistics.median(before):8.1f} ms  "
+        f"after: median {statistics.median(after):8.1f} ms  "
+        f"(first call after: {after[0]:.1f} ms)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    bucket_name = os.environ["GCS_BUCKET_STORAGE"]
+    cx_location = os.environ["CONVERSATIONAL_AGENT_LOCATION"]
+    search_location = os.environ["VERTEX_SEARCH_LOCATION"]
+    cx_request = sessions_request()
+    vs_request = search_request()
+
+    cases = [
+        (
+            "dialogflow cx",
+            lambda: fresh_sessions_client().detect_intent(request=cx_request),
+            lambda: client_registry.get_sessions_client(cx_location).detect_intent(request=cx_request),
+        ),
+        (
+            "vertex search",
+            lambda: fresh_search_client().search(vs_request),
+            lambda: client_registry.get_search_client(search_location).search(vs_request),
+        ),
+        (
+            "cloud storage",
+            lambda: storage.Client().bucket(bucket_name).exists(),
+            lambda: client_registry.get_storage_client().bucket(bucket_name).exists(),
+        ),
+    ]
+    for name, before_fn, after_fn in cases:
+        before = timed(before_fn, args.iterations)
+        after = timed(after_fn, args.iterations)
+        report(name, before, after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Deadline and hedging behaviour of the async CX path against a fake CX server.
+
+Starts an in-process gRPC server implementing Sessions/DetectIntent with a
+scripted delay per call, registers a SessionsAsyncClient on an insecure
+channel to it under get_sessions_async_client's registry key, and checks:
+  - fast calls answer and feed the latency tracker,
+  - a call slower than the deadline is cut off close to the deadline,
+  - detect_intent_text sends the timeout reply when the reply token budget
+    runs out,
+  - a hedged request answers close to p95 + fast latency when the first
+    call stalls, and the stalled call is cancelled on the server.
+Run from the line_webhook directory:
+    python scripts/benchmark_cx_async_deadlines.py [--fast-ms 50] [--slow-ms 3000]
+"""
+import os
+import sys
+import time
+import argparse
+import asyncio
+import threading
+import concurrent.futures
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LOCATION_ID = "fake"
+os.environ.update(
+    {
+        "CX_ASYNC_PATH": "true",
+        "ANSWER_CACHE_ENABLED": "false",
+        "CONVERSATIONAL_AGENT_PROJECT_ID": "benchmark",
+        "CONVERSATIONAL_AGENT_LOCATION": LOCATION_ID,
+        "CONVERSATIONAL_AGENT_ID": "agent",
+    }
+)
+
+import grpc
+from google.api_core.exceptions import DeadlineExceeded
+from google.cloud import dialogflowcx_v3beta1 as dialogflow
+
+from commons import client_registry
+from commons.dialogflowcx_async import (
+    LINE_REPLY_TOKEN_TTL_SECONDS,
+    CX_DEADLINE_MARGIN_SECONDS,
+    _event_loop,
+    cx_latency,
+    detect_intent_async,
+    detect_intent_with_deadline,
+)
+from commons.dialogflowcx_answer import detect_intent_text, CX_TIMEOUT_MESSAGE
+
+SERVICE = "google.cloud.dialogflow.cx.v3beta1.Sessions"
+
+
+class FakeSessions:
+    """DetectIntent that sleeps for the next scripted delay, default fast."""
+
+    def __init__(self, fast_seconds):
+        self.fast_seconds = fast_seconds
+        self.delays = []
+        self.calls = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def script(self, *delays):
+        with self._lock:
+            self.delays = list(delays)
+            self.calls = self.cancelled = 0
+
+    def detect_intent(self, request, context):
+        with self._lock:
+            call = self.calls
+            self.calls += 1
+            delay = self.delays.pop(0) if self.delays else self.fast_seconds
+        end = time.monotonic() + delay
+        while time.monotonic() < end:
+            if not context.is_active():
+                with self._lock:
+                    self.cancelled += 1
+                return dialogflow.DetectIntentResponse()
+            time.sleep(0.005)
+        text = f"answer to call {call}"
+        return dialogflow.DetectIntentResponse(
+            query_result=dialogflow.QueryResult(
+                response_messages=[
+                    dialogflow.ResponseMessage(text=dialogflow.ResponseMessage.Text(text=[text]))
+                ]
+            )
+        )
+
+
+def start_server(sessions):
+    server = grpc.server(concurrent.futures.ThreadPoolExecutor(max_workers=16))
+    handler = grpc.unary_unary_rpc_method_handler(
+        sessions.detect_intent,
+        request_deserializer=dialogflow.DetectIntentRequest.deserialize,
+        response_serializer=dialogflow.DetectIntentResponse.serialize,
+    )
+    server.add_generic_rpc_handlers(
+        [grpc.method_handlers_generic_handler(SERVICE, {"DetectIntent": handler})]
+    )
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, f"127.0.0.1:{port}"
+
+
+def register_fake_client(address):
+    """Builds the async client on the CX event loop, where it will be awaited."""
+
+    async def build():
+        def factory():
+            transport_cls = dialogflow.SessionsAsyncClient.get_transport_class("grpc_asyncio")
+            channel = grpc.aio.insecure_channel(address, options=client_registry.GRPC_CHANNEL_OPTIONS)
+            return dialogflow.SessionsAsyncClient(transport=transport_cls(channel=channel))
+
+        return client_registry.get_client(("dialogflow_sessions_async", LOCATION_ID), factory)
+
+    asyncio.run_coroutine_threadsafe(build(), _event_loop()).result()
+
+
+def make_request(text):
+    return dialogflow.DetectIntentRequest(
+        session=f"projects/benchmark/locations/{LOCATION_ID}/agents/agent/sessions/s",
+        query_input=dialogflow.QueryInput(
+            text=dialogflow.TextInput(text=text), language_code="th"
+        ),
+    )
+
+
+def timed(fn):
+    start = time.monotonic()
+    try:
+        result = fn()
+    except Exception as e:
+        result = e
+    return result, time.monotonic() - start
+
+
+def check(name, ok, detail):
+    print(f"[{'ok' if ok else 'FAIL'}] {name}: {detail}")
+    return ok
+
+
+class RecordingLineApi:
+    def __init__(self):
+        self.replies = []
+
+    def reply_message(self, request):
+        self.replies.append([message.text for message in request.messages])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fast-ms", type=float, default=50)
+    parser.add_argument("--slow-ms", type=float, default=3000)
+    parser.add_argument("--deadline-ms", type=float, default=500)
+    args = parser.parse_args()
+    fast, slow, deadline = args.fast_ms / 1000, args.slow_ms / 1000, args.deadline_ms / 1000
+
+    sessions = FakeSessions(fast)
+    server, address = start_server(sessions)
+    register_fake_client(address)
+    results = []
+
+    # 1. Fast calls answer and warm up the p95 tracker used for hedging
+    latencies = []
+    for _ in range(25):
+        response, seconds = timed(lambda: detect_intent_with_deadline(make_request("hi"), LOCATION_ID, 5))
+        latencies.append(seconds)
+    results.append(
+        check(
+            "fast calls",
+            isinstance(response, dialogflow.DetectIntentResponse),
+            f"median {sorted(latencies)[len(latencies) // 2] * 1000:.0f} ms, "
+            f"p95 {cx_latency.percentile(0.95) * 1000:.0f} ms",
+        )
+    )
+
+    # 2. A call slower than its deadline is cut off near the deadline
+    sessions.script(slow)
+    error, seconds = timed(lambda: detect_intent_with_deadline(make_request("slow"), LOCATION_ID, deadline))
+    results.append(
+        check(
+            "deadline",
+            isinstance(error, (DeadlineExceeded, concurrent.futures.TimeoutError)) and seconds < deadline + 0.3,
+            f"{type(error).__name__} after {seconds * 1000:.0f} ms (deadline {deadline * 1000:.0f} ms)",
+        )
+    )
+
+    # 3. detect_intent_text derives the deadline from the event timestamp
+    sessions.script(slow)
+    line_bot_api = RecordingLineApi()
+    event_timestamp = (time.time() - (LINE_REPLY_TOKEN_TTL_SECONDS - CX_DEADLINE_MARGIN_SECONDS - deadline)) * 1000
+    _, seconds = timed(
+        lambda: detect_intent_text("slow", "s", line_bot_api, "token", event_timestamp=event_timestamp)
+    )
+    results.append(
+        check(
+            "reply token budget",
+            line_bot_api.replies == [[CX_TIMEOUT_MESSAGE]] and seconds < deadline + 0.3,
+            f"timeout reply after {seconds * 1000:.0f} ms",
+        )
+    )
+
+    # 4. First call stalls, the hedge sent after p95 answers
+    p95 = cx_latency.percentile(0.95)
+    for hedge in (False, True):
+        sessions.script(slow, fast)
+        future = asyncio.run_coroutine_threadsafe(
+            detect_intent_async(make_request("hedge"), LOCATION_ID, slow + 1, hedge=hedge), _event_loop()
+        )
+        response, seconds = timed(lambda: future.result())
+        time.sleep(0.1)
+        text = response.query_result.response_messages[0].text.text[0]
+        if hedge:
+            ok = text == "answer to call 1" and seconds < p95 + fast + 0.2 and sessions.cancelled == 1
+        else:
+            ok = text == "answer to call 0" and sessions.calls == 1
+        results.append(
+            check(
+                f"hedge={hedge}",
+                ok,
+                f"{text!r} after {seconds * 1000:.0f} ms, server calls {sessions.calls}, "
+                f"cancelled {sessions.cancelled}",
+            )
+        )
+
+    server.stop(0)
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""CPU time and allocations of reading a DetectIntentResponse: MessageToDict vs direct protobuf access.
+
+Pass a folder of recorded responses saved with
+`dialogflow.DetectIntentResponse.to_json(response)`; without one a synthetic
+generative response with a large action trace is used. Run from the
+line_webhook directory:
+    python scripts/benchmark_cx_extraction.py [recorded_responses/]
+"""
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import dialogflowcx_v3beta1 as dialogflow
+from google.protobuf.json_format import MessageToDict
+
+from commons.cx_response import extract_cx_response
+
+
+def legacy_extract(response):
+    """The MessageToDict + get_nested path this replaced."""
+    response_dict = MessageToDict(response._pb)
+
+    def get_nested(data, keys, default=None):
+        for key in keys:
+            try:
+                data = data[key]
+            except (KeyError, IndexError, TypeError):
+                return default
+        return data
+
+    texts = []
+    actions = ["queryResult", "generativeInfo", "actionTracingInfo", "actions"]
+    text = get_nested(response_dict, actions + [2, "agentUtterance", "text"])
+    if text:
+        texts.append(text)
+    text = get_nested(response_dict, ["queryResult", "responseMessages", 0, "text", "text", 0])
+    if text and text not in texts:
+        texts.append(text)
+    search_result = get_nested(
+        response_dict, actions + [1, "toolUse", "outputActionParameters", "200", "search_result"]
+    )
+    return texts, search_result
+
+
+def synthetic_response():
+    products = [
+        {"name": f"สินค้า {i}", "price": 100 + i, "sku": f"SKU{i}", "image_url": f"https://example.com/{i}.png"}
+        for i in range(12)
+    ]
+    history = [
+        {"userUtterance": {"text": f"คำถามก่อนหน้า {i} " * 20}} for i in range(40)
+    ]
+    return dialogflow.DetectIntentResponse.from_json(
+        json.dumps(
+            {
+                "queryResult": {
+                    "text": "หาน้ำดื่ม",
+                    "responseMessages": [{"text": {"text": ["นี่คือสินค้าที่พบค่ะ"]}}],
+                    "generativeInfo": {
+                        "actionTracingInfo": {
+                            "actions": [
+                                {"userUtterance": {"text": "หาน้ำดื่ม"}},
+                                {
+                                    "toolUse": {
+                                        "tool": "products",
+                                        "inputActionParameters": {"query": "น้ำดื่ม"},
+                                        "outputActionParameters": {"200": {"search_result": products}},
+                                    }
+                                },
+                                {"agentUtterance": {"text": "นี่คือสินค้าที่พบค่ะ"}},
+                            ]
+                            + history,
+                            "conversationState": "OUTPUT_STATE_OK",
+                        }
+                    },
+                    "diagnosticInfo": {"trace": ["step " * 50 for _ in range(50)]},
+                }
+            }
+        )
+    )
+
+
+def load_responses(directory):
+    responses = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".json"):
+            with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                responses.append(dialogflow.DetectIntentResponse.from_json(f.read(), ignore_unknown_fields=True))
+    return responses
+
+
+def measure(name, extract, responses, iterations=200):
+    start = time.process_time()
+    for _ in range(iterations):
+        for response in responses:
+            extract(response)
+    cpu = (time.process_time() - start) / (iterations * len(responses))
+
+    tracemalloc.start()
+    for response in responses:
+        extract(response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<16} {cpu * 1e6:9.1f} us CPU/response  peak {peak / 1024:8.1f} KiB")
+
+
+def main():
+    if len(sys.argv) > 1:
+        responses = load_responses(sys.argv[1])
+    else:
+        responses = [synthetic_response()]
+    for response in responses:
+        assert legacy_extract(response) == extract_cx_response(response)
+
+    print(f"{len(responses)} response(s)")
+    measure("MessageToDict", legacy_extract, responses)
+    measure("direct protobuf", extract_cx_response, responses)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Microbenchmark for rendering a 12-bubble fund carousel.
+
+Compares the old dict -> json.dumps -> FlexContainer.from_json path with
+building the SDK models directly. Run from the line_webhook directory:
+    python scripts/benchmark_flex_builder.py
+"""
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linebot.v3.messaging import FlexContainer, FlexCarousel, FlexMessage
+
+from commons.flex_message_builder import build_fund_bubble
+
+
+FUNDS = [
+    {
+        "fundCode": f"K-FUND{i}",
+        "fundNameThai": f"กองทุนเปิดเค ทดสอบ {i}",
+        "NAV": 10.1234 + i,
+        "return1D": -0.5 + i * 0.1,
+        "returnYTD": -3.0 + i,
+        "riskSpectrum": i % 8 + 1,
+        "NAVDate": 20250301,
+    }
+    for i in range(12)
+]
+
+
+def legacy_fund_bubble(fund_data):
+    """The dict + json.dumps + FlexContainer.from_json path this replaced."""
+    return1D_color = "#FF5555" if fund_data["return1D"] < 0 else "#00AA00"
+    returnYTD_color = "#FF5555" if fund_data["returnYTD"] < 0 else "#00AA00"
+    bubble = legacy_bubble_dict(fund_data, return1D_color, returnYTD_color)
+    return FlexContainer.from_json(json.dumps(bubble))
+
+
+def legacy_bubble_dict(fund_data, return1D_color, returnYTD_color):
+    return {
+        "type": "bubble",
+        "body": {
+            "type": "box",
+            "layout": "vertical",
+            "contents": [
+                {
+                    "type": "text",
+                    "text": fund_data["fundCode"],
+                    "weight": "bold",
+                    "size": "lg",
+                    "wrap": True,
+                },
+                {
+                    "type": "text",
+                    "text": fund_data["fundNameThai"],
+                    "size": "sm",
+                    "color": "#666666",
+                    "wrap": True,
+                },
+                {"type": "separator", "margin": "md"},
+                {
+                    "type": "box",
+                    "layout": "vertical",
+                    "margin": "md",
+                    "spacing": "sm",
+                    "contents": [
+                        {
+                            "type": "box",
+                            "layout": "horizontal",
+                            "contents": [
+                                {
+                                    "type": "text",
+                                    "text": "NAV",
+                                    "size": "sm",
+                                    "color": "#555555",
+                                    "flex": 2,
+                                },
+                                {
+                                    "type": "text",
+                                    "text": f"{fund_data['NAV']} บาท",
+                                    "size": "sm",
+                                    "color": "#111111",
+                                    "align": "end",
+                                    "flex": 3,
+                                },
+                            ],
+                        },
+                        {
+                            "type": "box",
+                            "layout": "horizontal",
+                            "contents": [
+                                {
+                                    "type": "text",
+                                    "text": "เปลี่ยนแปลง (1D)",
+                                    "size": "sm",
+                                    "color": "#555555",
+                                    "flex": 2,
+                                },
+                                {
+                                    "type": "text",
+                                    "text": f"{fund_data['return1D']}%",
+                                    "size": "sm",
+                                    "color": return1D_color,
+                                    "align": "end",
+                                    "flex": 3,
+                                },
+                            ],
+                        },
+                        {
+                            "type": "box",
+                            "layout": "horizontal",
+                            "contents": [
+                                {
+                                    "type": "text",
+                                    "text": "ผลตอบแทน YTD",
+                                    "size": "sm",
+                                    "color": "#555555",
+                                    "flex": 2,
+                                },
+                                {
+                                    "type": "text",
+                                    "text": f"{fund_data['returnYTD']}%",
+                                    "size": "sm",
+                                    "color": returnYTD_color,
+                                    "align": "end",
+                                    "flex": 3,
+                                },
+                            ],
+                        },
+                        {
+                            "type": "box",
+                            "layout": "horizontal",
+                            "contents": [
+                                {
+                                    "type": "text",
+                                    "text": "Risk Level",
+                                    "size": "sm",
+                                    "color": "#555555",
+                                    "flex": 2,
+                                },
+                                {
+                                    "type": "text",
+                                    "text": (
+                                        f"{fund_data['riskSpectrum']} (สูง)"
+                                        if fund_data["riskSpectrum"] >= 5
+                                        else f"{fund_data['riskSpectrum']} (ปานกลาง)"
+                                    ),
+                                    "size": "sm",
+                                    "color": "#111111",
+                                    "align": "end",
+                                    "flex": 3,
+                                },
+                            ],
+                        },
+                    ],
+                },
+                {"type": "separator", "margin": "md"},
+                {
+                    "type": "box",
+                    "layout": "horizontal",
+                    "margin": "md",
+                    "contents": [
+                        {
+                            "type": "text",
+                            "text": f"ข้อมูล ณ วันที่ {str(fund_data['NAVDate'])[:4]}-{str(fund_data['NAVDate'])[4:6]}-{str(fund_data['NAVDate'])[6:]}",
+                            "size": "xs",
+                            "color": "#999999",
+                            "flex": 1,
+                            "align": "start",
+                        }
+                    ],
+                },
+            ],
+        },
+    }
+
+
+
+def render(build_bubble):
+    return FlexMessage(
+        alt_text="benchmark",
+        contents=FlexCarousel(type="carousel", contents=[build_bubble(f) for f in FUNDS]),
+    )
+
+
+def measure(name, build_bubble, iterations=200):
+    render(build_bubble)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render(build_bubble)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    message = render(build_bubble)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in diff)
+    print(
+        f"{name:<8} {elapsed * 1000:8.3f} ms/carousel  "
+        f"peak {peak / 1024:8.1f} KiB  retained blocks {blocks:6d}"
+    )
+    return message
+
+
+def main():
+    assert render(legacy_fund_bubble).to_dict() == render(build_fund_bubble).to_dict()
+    measure("before", legacy_fund_bubble)
+    measure("after", build_fund_bubble)
+
+
+if __name__ == "__main__":
+    main()
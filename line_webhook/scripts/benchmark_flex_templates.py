@@ -0,0 +1,64 @@
+"""Throughput of the compiled Flex template engine, in bubbles per second.
+
+Run from the line_webhook directory:
+    python scripts/benchmark_flex_templates.py
+"""
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linebot.v3.messaging import FlexContainer
+
+from commons.flex_templates import TEMPLATES_DIR, render_template
+from commons.flex_message_builder import _product_values
+
+
+PRODUCTS = [
+    {
+        "name": f"น้ำดื่มสิงห์ ขนาด {i * 100} มล.",
+        "price": 10 + i,
+        "sku": f"SKU-{i:04d}",
+        "image_url": f"https://example.com/products/{i}.png",
+    }
+    for i in range(12)
+]
+
+
+def reparse_per_request(values):
+    """Reads the file and substitutes placeholders in the raw JSON text."""
+    with open(os.path.join(TEMPLATES_DIR, "flex_product_bubble.json"), encoding="utf-8") as f:
+        raw = f.read()
+    for placeholder, value in values.items():
+        raw = raw.replace(f"<{placeholder}>", str(value))
+    return json.loads(raw)
+
+
+def compiled(values):
+    return render_template("flex_product_bubble", values)
+
+
+def throughput(name, render, to_model, seconds=1.0):
+    bubbles = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for idx, product in enumerate(PRODUCTS):
+            bubble = render(_product_values(product, idx + 1))
+            if to_model:
+                FlexContainer.from_dict(bubble)
+        bubbles += len(PRODUCTS)
+    rate = bubbles / (time.perf_counter() - start)
+    print(f"{name:<34} {rate:12,.0f} bubbles/s")
+
+
+def main():
+    throughput("re-read + re-parse (dict)", reparse_per_request, False)
+    throughput("compiled template (dict)", compiled, False)
+    throughput("re-read + re-parse -> FlexContainer", reparse_per_request, True)
+    throughput("compiled template -> FlexContainer", compiled, True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Bytes sent, pre-processing time, upload time and model latency per target size.
+
+Run from the line_webhook directory with a folder of sample images:
+    python scripts/benchmark_image_preprocess.py samples/ --sizes 512 768 1024 original
+Add --live to also upload to GCS_BUCKET_STORAGE and call Gemini (needs credentials).
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commons.image_preprocess import IMAGE_JPEG_QUALITY, preprocess_image
+
+
+def load_samples(directory):
+    samples = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
+            with open(os.path.join(directory, filename), "rb") as f:
+                samples.append(f.read())
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("samples_dir")
+    parser.add_argument("--sizes", nargs="+", default=["512", "768", "1024", "1600", "original"])
+    parser.add_argument("--quality", type=int, default=IMAGE_JPEG_QUALITY)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples_dir)
+    if not samples:
+        sys.exit(f"No images found in {args.samples_dir}")
+
+    if args.live:
+        from commons.gcs_utils import upload_blob_from_memory
+        from commons.gemini_image_understanding import gemini_describe_image
+
+    print(f"{len(samples)} images, {sum(map(len, samples)) / len(samples) / 1024:.1f} KiB average original")
+    for size in args.sizes:
+        sent, prep, upload, model = [], [], [], []
+        for idx, sample in enumerate(samples):
+            start = time.perf_counter()
+            data = sample if size == "original" else preprocess_image(sample, int(size), args.quality)
+            prep.append(time.perf_counter() - start)
+            sent.append(len(data))
+
+            if args.live:
+                message_id = f"benchmark-{size}-{idx}"
+                start = time.perf_counter()
+                upload_blob_from_memory(contents=data, type="image", user_id="benchmark", message_id=message_id)
+                upload.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                gemini_describe_image(user_id="benchmark", message_id=message_id, image_bytes=data)
+                model.append(time.perf_counter() - start)
+
+        line = (
+            f"{size:>8}: {statistics.mean(sent) / 1024:8.1f} KiB sent"
+            f"  preprocess {statistics.mean(prep) * 1000:7.1f} ms"
+        )
+        if args.live:
+            line += (
+                f"  upload {statistics.median(upload) * 1000:7.1f} ms"
+                f"  model {statistics.median(model) * 1000:7.1f} ms"
+            )
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
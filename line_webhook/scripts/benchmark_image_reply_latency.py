@@ -0,0 +1,58 @@
+"""Reply latency of handle_image_message: sequential upload + gs:// read vs inline bytes.
+
+Needs GCP_PROJECT_ID, GCS_BUCKET_STORAGE and service account credentials.
+Run from the line_webhook directory:
+    python scripts/benchmark_image_reply_latency.py path/to/image.jpg --iterations 5
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commons.gcs_utils import upload_blob_from_memory
+from commons.media_archiver import media_archiver
+from commons.gemini_image_understanding import gemini_describe_image
+
+
+def sequential(contents, message_id):
+    upload_blob_from_memory(contents=contents, type="image", user_id="benchmark", message_id=message_id)
+    gemini_describe_image(user_id="benchmark", message_id=message_id)
+
+
+def overlapped(contents, message_id):
+    media_archiver.archive(contents=contents, type="image", user_id="benchmark", message_id=message_id)
+    gemini_describe_image(user_id="benchmark", message_id=message_id, image_bytes=contents)
+    reply_at = time.perf_counter()
+    media_archiver.flush()
+    return reply_at
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("image")
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        contents = f.read()
+
+    before, after = [], []
+    for idx in range(args.iterations):
+        start = time.perf_counter()
+        sequential(contents, f"seq-{idx}")
+        before.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        reply_at = overlapped(contents, f"inline-{idx}")
+        after.append(reply_at - start)
+
+    print(f"image size: {len(contents) / 1024:.1f} KiB")
+    print(f"upload then gs:// read: median {statistics.median(before):.3f}s")
+    print(f"inline bytes + overlap: median {statistics.median(after):.3f}s (time until description is ready)")
+
+
+if __name__ == "__main__":
+    main()
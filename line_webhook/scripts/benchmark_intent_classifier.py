@@ -0,0 +1,67 @@
+"""Latency and CX call volume of the local intent pre-classifier.
+
+Trains on 4/5 of data/intent_examples.tsv and evaluates on the held out
+fifth, or on a file of real messages (one per line) when given. A message
+skips CX when the classifier is confident and the parameters it needs can be
+extracted; fund queries additionally need privates/fund_snapshot.ndjson.
+Run from the line_webhook directory:
+    python scripts/benchmark_intent_classifier.py [messages.txt]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commons.intent_classifier import IntentClassifier, INTENT_MIN_CONFIDENCE, load_examples
+from commons.local_handlers import extract_tax_params, extract_retirement_params, extract_fund_query
+from commons.fund_index import local_fund_lookup
+
+
+def answerable(intent, text):
+    if intent == "tax":
+        return extract_tax_params(text) is not None
+    if intent == "retirement":
+        return extract_retirement_params(text) is not None
+    if intent == "fund":
+        query = extract_fund_query(text)
+        return bool(query) and local_fund_lookup(query) is not None
+    return False
+
+
+def main():
+    examples = load_examples()
+    train = [example for i, example in enumerate(examples) if i % 5]
+    held_out = [example for i, example in enumerate(examples) if not i % 5]
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r", encoding="utf-8") as f:
+            held_out = [(None, line.strip()) for line in f if line.strip()]
+
+    start = time.perf_counter()
+    classifier = IntentClassifier.train(train)
+    print(f"trained on {len(train)} examples in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    latencies = []
+    confident = correct = skipped = 0
+    for label, text in held_out:
+        start = time.perf_counter()
+        intent, probability = classifier.predict(text)
+        latencies.append(time.perf_counter() - start)
+        if probability < INTENT_MIN_CONFIDENCE:
+            continue
+        confident += 1
+        correct += label is not None and intent == label
+        skipped += answerable(intent, text)
+
+    latencies.sort()
+    count = len(held_out)
+    print(f"messages:            {count}")
+    print(f"classify p50 / p99:  {latencies[count // 2] * 1e6:.0f} / {latencies[int(count * 0.99)] * 1e6:.0f} us")
+    print(f"confident (>= {INTENT_MIN_CONFIDENCE}): {confident} ({confident / count:.0%})")
+    if held_out[0][0] is not None:
+        print(f"confident accuracy:  {correct / max(confident, 1):.0%}")
+    print(f"CX calls:            {count} -> {count - skipped} ({skipped / count:.0%} fewer)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compares sequential and parallel dispatch of a multi-event webhook body.
+
+Run from the line_webhook directory:
+    python scripts/benchmark_parallel_dispatch.py
+"""
+import os
+import sys
+import time
+import random
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commons.event_dispatcher import ParallelEventDispatcher
+
+
+def make_events(num_users, events_per_user):
+    events = []
+    for seq in range(events_per_user):
+        for user in range(num_users):
+            events.append(
+                SimpleNamespace(
+                    source=SimpleNamespace(user_id=f"U{user}"),
+                    seq=seq,
+                    latency=random.uniform(0.05, 0.4),
+                )
+            )
+    return events
+
+
+def main():
+    random.seed(7)
+    events = make_events(num_users=10, events_per_user=2)
+    seen = {}
+
+    def fake_handler(event):
+        # Stand-in for a detect_intent_text round-trip
+        time.sleep(event.latency)
+        user_id = event.source.user_id
+        assert seen.get(user_id, -1) == event.seq - 1, "per-user order broken"
+        seen[user_id] = event.seq
+
+    per_user = {}
+    for event in events:
+        per_user[event.source.user_id] = per_user.get(event.source.user_id, 0) + event.latency
+
+    start = time.perf_counter()
+    for event in events:
+        fake_handler(event)
+    sequential = time.perf_counter() - start
+
+    seen.clear()
+    dispatcher = ParallelEventDispatcher(fake_handler, max_workers=len(per_user))
+    start = time.perf_counter()
+    dispatcher.dispatch(events)
+    parallel = time.perf_counter() - start
+
+    print(f"events: {len(events)} from {len(per_user)} users")
+    print(f"sum of event latencies:     {sum(e.latency for e in events):.3f}s")
+    print(f"slowest user (serial part): {max(per_user.values()):.3f}s")
+    print(f"sequential dispatch:        {sequential:.3f}s")
+    print(f"parallel dispatch:          {parallel:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Peak RSS of archiving a large payload: in-memory upload vs streaming resumable upload.
+
+Starts a minimal fake GCS server on localhost (simple, multipart and
+resumable uploads; bodies are counted and discarded) and runs each mode in
+its own process so ru_maxrss is measured independently. Run from the
+line_webhook directory:
+    python scripts/benchmark_streaming_upload.py --size-mb 200
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import resource
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+READ_SIZE = 64 * 1024
+
+
+class FakeGCSHandler(BaseHTTPRequestHandler):
+    uploads = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _drain(self):
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining:
+            remaining -= len(self.rfile.read(min(READ_SIZE, remaining)))
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _object(self, name, size):
+        return {"kind": "storage#object", "bucket": "benchmark", "name": name, "size": str(size), "generation": "1"}
+
+    def do_POST(self):
+        self._drain()
+        if "uploadType=resumable" in self.path:
+            upload_id = str(len(self.uploads))
+            self.uploads[upload_id] = 0
+            location = f"http://{self.headers['Host']}/upload/resumable/{upload_id}"
+            self._send_json(200, {}, {"Location": location})
+        else:
+            self._send_json(200, self._object("object", self.headers.get("Content-Length", 0)))
+
+    def do_PUT(self):
+        upload_id = self.path.rsplit("/", 1)[-1]
+        self._drain()
+        match = re.match(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)", self.headers.get("Content-Range", ""))
+        if match and match.group(2) is not None:
+            self.uploads[upload_id] = int(match.group(2)) + 1
+        total = match.group(3) if match else "*"
+        if total != "*":
+            self._send_json(200, self._object("object", total))
+            return
+        self.send_response(308)
+        self.send_header("Range", f"bytes=0-{self.uploads[upload_id] - 1}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_DELETE(self):
+        # Cancelling a resumable upload
+        self.uploads.pop(self.path.rsplit("/", 1)[-1], None)
+        self.send_response(499)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def payload_chunks(size, chunk_size=READ_SIZE):
+    """Stand-in for LINE message content arriving over the network."""
+    block = os.urandom(chunk_size)
+    sent = 0
+    while sent < size:
+        chunk = block[: min(chunk_size, size - sent)]
+        sent += len(chunk)
+        yield chunk
+
+
+def run_mode(mode, size):
+    from commons.gcs_utils import upload_blob_from_memory, upload_blob_from_stream
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "memory":
+        contents = b"".join(payload_chunks(size))
+        upload_blob_from_memory(contents, type="audio", user_id="benchmark", message_id="memory")
+    else:
+        upload_blob_from_stream(payload_chunks(size), type="audio", user_id="benchmark", message_id="stream")
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode:<7} peak RSS {peak / 1024:8.1f} MiB  (+{(peak - baseline) / 1024:7.1f} MiB over baseline)  {elapsed:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--mode", choices=["memory", "stream"])
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+
+    if args.mode:
+        run_mode(args.mode, size)
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGCSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    env = dict(
+        os.environ,
+        STORAGE_EMULATOR_HOST=f"http://127.0.0.1:{server.server_port}",
+        GCS_BUCKET_STORAGE="benchmark",
+        GOOGLE_CLOUD_PROJECT="benchmark",
+    )
+    print(f"payload: {args.size_mb} MiB")
+    for mode in ("memory", "stream"):
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode, "--size-mb", str(args.size_mb)],
+            env=env,
+            check=True,
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
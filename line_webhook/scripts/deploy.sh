@@ -17,3 +17,10 @@ gcloud functions deploy $FUNCTION_NAME \
     --env-vars-file=privates/line_secret.yml \
     --memory=1GB \
     --timeout=150s 
+
+
+# Media archiving and async event processing keep running after the 200
+# response, keep CPU allocated between requests
+gcloud run services update $FUNCTION_NAME \
+    --region=asia-southeast1 \
+    --no-cpu-throttling
@@ -0,0 +1,61 @@
+"""Exports fund structData from the Vertex AI Search data store to a local snapshot.
+
+Run from the line_webhook directory (e.g. daily, after NAVs are published):
+    python scripts/export_fund_snapshot.py --output privates/fund_snapshot.ndjson
+
+Also writes the columnar snapshot used for ranking queries to --columns-dir.
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import discoveryengine_v1 as discoveryengine
+from google.protobuf.json_format import MessageToDict
+
+from commons.fund_index import FUND_SNAPSHOT_PATH
+from commons.fund_columns import FUND_COLUMNS_DIR, export_fund_columns
+
+
+def fetch_fund_records():
+    project_id = os.environ["VERTEX_SEARCH_PROJECT_ID"]
+    location = os.environ["VERTEX_SEARCH_LOCATION"]
+    data_store = os.environ["VERTEX_SEARCH_DATASTORE_ID"]
+
+    client_options = None
+    if location != "global":
+        client_options = {"api_endpoint": f"{location}-discoveryengine.googleapis.com"}
+    client = discoveryengine.DocumentServiceClient(client_options=client_options)
+    parent = (
+        f"projects/{project_id}/locations/{location}/collections/default_collection"
+        f"/dataStores/{data_store}/branches/default_branch"
+    )
+
+    records = []
+    for document in client.list_documents(parent=parent):
+        struct_data = MessageToDict(document._pb).get("structData")
+        if struct_data:
+            records.append(struct_data)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default=FUND_SNAPSHOT_PATH)
+    parser.add_argument("--columns-dir", default=FUND_COLUMNS_DIR)
+    args = parser.parse_args()
+
+    records = fetch_fund_records()
+    tmp_path = args.output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, args.output)
+    export_fund_columns(records, args.columns_dir)
+    print(f"Exported {len(records)} funds to {args.output} and {args.columns_dir}")
+
+
+if __name__ == "__main__":
+    main()